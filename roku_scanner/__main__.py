@@ -5,23 +5,51 @@ Usage:
 
 CLI-Args:
     --timeout, -t :: Timeout for each device discovery query
+    --receive-buffer :: Discovery socket receive buffer size in bytes.
     --search-target-all, -s :: Search for all devices on network including non-Roku devices
     --json :: Returns results as json. Default format is xml.
+    --format :: Output format xml, json, jsonl, msgpack or cbor. Default format is xml. jsonl, msgpack and cbor are
+        device dumps readable with formats.load_dump().
+    --compress :: Compress output with gzip or zstd.
+    --output, -o :: Write output to a file instead of stdout.
     --pretty :: Pretty print json. Can only be used in conjunction with json flag.
     --exclude :: Excludes certain ECP data from the output.
+    --endpoints :: ECP endpoints to fetch, replaces the default device-info, apps, active-app and media-player.
     --verbose :: Verbose logging.
+    --max-concurrency :: ECP requests in flight across all devices.
+    --per-device-concurrency :: ECP requests in flight per device.
+    --rate-limit :: Maximum ECP requests per second across all devices.
+    --record :: Record every discovery datagram and ECP response into a trace file.
+    --replay :: Replay a recorded trace instead of using the network.
+    --replay-speed :: Replay timing factor, 1 keeps the original timing, 0 replays without waiting.
+    --trace :: Write per-device trace spans of every phase to a file.
+    --trace-format :: Trace span format, jsonl or chrome.
+    --profile :: Profile discovery, fetch and serialize phases with cProfile into a directory.
+    --power-on :: Wake devices with Wake-on-LAN and report time until each is ready.
+    --where :: Filter expression, clauses on discovery fields are applied before fetching.
 
 ToDos:
     1. find something to do with non roku devices, could be useful?
 """
 import argparse
+import sys
 
 from tqdm import tqdm  # type: ignore
-from typing import List, Union
+from typing import Callable, List, Union
 
 from roku_scanner.custom_types import ArgList, ArgParser
+from roku_scanner.endpoints import ENDPOINTS, set_default_endpoints
+from roku_scanner.fleet import Condition, Fleet, parse_where
+from roku_scanner.formats import COMPRESSIONS, FORMATS, Target, dump, open_output
+from roku_scanner.recording import TracePlayer, TraceRecorder, get_recorder, set_player, set_recorder
 from roku_scanner.roku import Roku
-from roku_scanner.scanner import Scanner
+from roku_scanner.scanner import DEFAULT_RECEIVE_BUFFER_SIZE, Scanner
+from roku_scanner.scheduler import RequestScheduler, set_scheduler
+from roku_scanner.tracing import (
+    TRACE_FORMATS, Profiler, Tracer, get_profiler, get_tracer, profile_phase, set_profiler, set_tracer, span
+)
+
+ENDPOINT_CHOICES: List[str] = [key.replace('_', '-') for key in ENDPOINTS]
 
 
 def verbose_logging(output: str, show: bool):
@@ -45,6 +73,13 @@ def main() -> None:
         required=False,
         help='Timeout for each device discovery query?'
     )
+    parser.add_argument(
+        '--receive-buffer',
+        type=int,
+        default=DEFAULT_RECEIVE_BUFFER_SIZE,
+        metavar='BYTES',
+        help='Discovery socket receive buffer size, raise it when scanning networks with many devices.'
+    )
     parser.add_argument(
         '-s',
         '--search-target-all',
@@ -57,6 +92,26 @@ def main() -> None:
         action='store_true',
         help='Returns results as json.'
     )
+    format_group.add_argument(
+        '--format',
+        choices=['xml', 'json'] + list(FORMATS),
+        default=None,
+        help='Output format. xml and json are single documents, jsonl, msgpack and cbor are device dumps readable '
+             'with formats.load_dump().'
+    )
+    format_group.add_argument(
+        '--compress',
+        choices=COMPRESSIONS,
+        default=None,
+        help='Compress output.'
+    )
+    format_group.add_argument(
+        '--output',
+        '-o',
+        type=str,
+        default=None,
+        help='Write output to a file instead of stdout.'
+    )
     format_group.add_argument(
         '--pretty',
         action='store_true',
@@ -69,58 +124,220 @@ def main() -> None:
     )
     parser.add_argument(
         '--exclude',
-        choices=['device-info', 'apps', 'active-app', 'media-player'],
+        choices=ENDPOINT_CHOICES,
         nargs='+',
         help='Data to exclude from output.'
     )
+    parser.add_argument(
+        '--endpoints',
+        choices=ENDPOINT_CHOICES,
+        nargs='+',
+        default=None,
+        help='ECP endpoints to fetch, up to --per-device-concurrency at a time. '
+             'Defaults to device-info apps active-app media-player.'
+    )
+    parser.add_argument(
+        '--where',
+        type=str,
+        default=None,
+        help='Filter devices, e.g. "Server~9.2 and model_number=3930X". Clauses on discovery fields skip fetching.'
+    )
+    request_group = parser.add_argument_group('Requests', 'ECP request scheduling')
+    request_group.add_argument(
+        '--max-concurrency',
+        type=int,
+        default=64,
+        help='ECP requests in flight across all devices.'
+    )
+    request_group.add_argument(
+        '--per-device-concurrency',
+        type=int,
+        default=4,
+        help='ECP requests in flight per device.'
+    )
+    request_group.add_argument(
+        '--rate-limit',
+        type=float,
+        default=None,
+        help='Maximum ECP requests per second across all devices.'
+    )
+    trace_group = parser.add_argument_group('Tracing', 'Record and replay of raw SSDP and ECP traffic')
+    trace_group.add_argument(
+        '--record',
+        type=str,
+        default=None,
+        metavar='FILE',
+        help='Record every discovery datagram and ECP response into a trace file.'
+    )
+    trace_group.add_argument(
+        '--replay',
+        type=str,
+        default=None,
+        metavar='FILE',
+        help='Replay a recorded trace instead of using the network.'
+    )
+    trace_group.add_argument(
+        '--replay-speed',
+        type=float,
+        default=1.0,
+        help='Replay timing factor, 1 keeps the original timing, 0 replays without waiting.'
+    )
+    trace_group.add_argument(
+        '--trace',
+        type=str,
+        default=None,
+        metavar='FILE',
+        help='Write per-device trace spans of every phase to a file.'
+    )
+    trace_group.add_argument(
+        '--trace-format',
+        choices=TRACE_FORMATS,
+        default='jsonl',
+        help='Trace span format, chrome can be loaded in chrome://tracing or Perfetto.'
+    )
+    trace_group.add_argument(
+        '--profile',
+        type=str,
+        default=None,
+        metavar='DIR',
+        help='Profile discovery, fetch and serialize phases with cProfile into DIR/{phase}.prof.'
+    )
+    parser.add_argument(
+        '--power-on',
+        action='store_true',
+        help='Wake matching devices with Wake-on-LAN and report time until each is ready. Only discovery field --where '
+             'clauses can be used.'
+    )
     args: ArgList = parser.parse_args()
     output_exclusions: List[str] = args.exclude
     if output_exclusions is not None:
         output_exclusions = list(map(lambda x: x.replace('-', '_'), output_exclusions))
 
+    if args.endpoints is not None:
+        set_default_endpoints([endpoint.replace('-', '_') for endpoint in args.endpoints])
+
     timeout: int = args.timeout
     search_target_all: bool = args.search_target_all
-    as_json: bool = args.json
-    pretty_print: bool = args.pretty
-    verbose: bool = args.verbose
 
-    scanner = Scanner(discovery_timeout=timeout)
+    try:
+        where: List[Condition] = parse_where(args.where)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.power_on and any(not condition.discovery for condition in where):
+        # devices are selected before any device data is fetched, other clauses would silently wake every device
+        parser.error('--power-on only supports --where clauses on discovery fields (Server, USN, LOCATION, ...).')
+
+    set_scheduler(RequestScheduler(
+        max_concurrency=args.max_concurrency,
+        per_device_concurrency=args.per_device_concurrency,
+        requests_per_second=args.rate_limit
+    ))
+
+    scanner = Scanner(discovery_timeout=timeout, receive_buffer_size=args.receive_buffer)
 
     if search_target_all:
         scanner.search_target = 'upnp:rootdevice'
 
+    if args.record is not None:
+        set_recorder(TraceRecorder(args.record))
+    if args.trace is not None:
+        set_tracer(Tracer())
+    if args.profile is not None:
+        set_profiler(Profiler(args.profile))
+
+    try:
+        run(args, scanner, where, output_exclusions)
+    finally:
+        recorder: Union[TraceRecorder, None] = get_recorder()
+        if recorder is not None:
+            recorder.close()
+            set_recorder(None)
+            verbose_logging(f'Recorded {recorder.events} events to {args.record}', args.verbose)
+
+        tracer: Union[Tracer, None] = get_tracer()
+        if tracer is not None:
+            tracer.export(args.trace, args.trace_format)
+            set_tracer(None)
+            verbose_logging(f'Wrote {len(tracer.spans)} spans to {args.trace}', args.verbose)
+
+        profiler: Union[Profiler, None] = get_profiler()
+        if profiler is not None:
+            for path in profiler.dump():
+                verbose_logging(f'Wrote profile {path}', args.verbose)
+            set_profiler(None)
+
+
+def run(args: ArgList, scanner: Scanner, where: List[Condition], output_exclusions: Union[List[str], None]) -> None:
+    """
+    Discovers, fetches and outputs devices according to cli args
+    """
+    verbose: bool = args.verbose
+    pretty_print: bool = args.pretty
+    output_format: str = args.format or ('json' if args.json else 'xml')
+    compression: Union[str, None] = args.compress
+    output: Union[str, None] = args.output
+
     verbose_logging('Scanning ...', verbose)
-    scanner.discover(verbose=verbose)
+    with profile_phase('discovery'), span('discovery'):
+        if args.replay is not None:
+            player: TracePlayer = TracePlayer.load(args.replay, args.replay_speed)
+            set_player(player)
+            player.discover(scanner, verbose=verbose)
+        else:
+            scanner.discover(verbose=verbose)
+    verbose_logging(
+        f'Received {scanner.received_datagrams} datagrams, {scanner.dropped_datagrams} dropped, '
+        f'{scanner.malformed_datagrams} malformed',
+        verbose
+    )
     verbose_logging('Scanning Complete', verbose)
 
-    found_data: str = f'<?xml version="1.0" encoding="UTF-8" ?>\n' \
-                      f'<devices>\n'
+    verbose_logging('Fetching device data', verbose)
+    fleet: Fleet = Fleet.from_discovery(scanner.discovered_devices, where)
+    verbose_logging(f'{len(fleet)} of {len(scanner.discovered_devices)} devices match discovery filters', verbose)
 
-    if as_json:
-        found_data = '{"devices": ['
+    if args.power_on:
+        for result in fleet.power_on():
+            if result['ready']:
+                print(f'{result["location"]} ({result["mac"]}): ready in {result["time_to_ready"]:.2f}s')
+            else:
+                print(f'{result["location"]} ({result["mac"]}): {result["error"]}')
+        return
 
-    verbose_logging('Fetching device data', verbose)
-    for device in tqdm(scanner.discovered_devices):
-        server: Union[str, None] = device.get('Server', None)
-        if server is not None and 'roku' in server.lower():
-            roku_location: Union[str, None] = device.get('LOCATION', None)
-
-            if roku_location is not None:
-                roku = Roku(location=roku_location, discovery_data=device)
-                roku.fetch_data()
-
-                if as_json:
-                    found_data += roku.as_json(output_exclusions, pretty_print) + ','
-                else:
-                    found_data += roku.as_xml(output_exclusions)
+    fleet.fetch_data(progress=lambda pending: tqdm(pending, total=len(fleet)))
+    for location, error in fleet.fetch_errors.items():
+        verbose_logging(f'Failed to fetch {location}: {type(error).__name__}: {error}', verbose)
+    fleet = fleet.where([condition for condition in where if not condition.discovery])
+
+    target: Target = output if output is not None else sys.stdout.buffer
+
+    with profile_phase('serialize'):
+        if output_format in FORMATS:
+            dump(fleet, target, output_format, compression, exclude=output_exclusions)
+            return
+
+        with open_output(target, compression) as stream:
+            if output_format == 'json':
+                json_out: str = ','.join(
+                    serialize(roku, 'json', lambda: roku.as_json(output_exclusions, pretty_print)) for roku in fleet
+                )
+                stream.write(('{"devices": [' + json_out + ']}\n').encode('utf8'))
             else:
-                raise Exception('Unable to find LOCATION in device data.')
+                xml_out: str = ''.join(
+                    serialize(roku, 'xml', lambda: roku.as_xml(output_exclusions)) for roku in fleet
+                )
+                stream.write(
+                    f'<?xml version="1.0" encoding="UTF-8" ?>\n<devices>\n{xml_out}</devices>\n'.encode('utf8')
+                )
 
-    if as_json:
-        json_out = found_data[:-1] + ']}'
-        print(json_out)
-    else:
-        print(found_data + '</devices>')
+
+def serialize(roku: Roku, output_format: str, formatter: Callable[[], str]) -> str:
+    """
+    Formats a device inside a serialize trace span
+    """
+    with span('serialize', device=roku.location, usn=roku.discovery_data.get('USN', None), format=output_format):
+        return formatter()
 
 
 if __name__ == "__main__":
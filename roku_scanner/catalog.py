@@ -0,0 +1,269 @@
+# coding=utf-8
+import sys
+
+from typing import AbstractSet, Dict, Iterable, List, NamedTuple, Set, Tuple, Union
+
+from .custom_types import RokuApp
+from .roku import Roku, _intern
+
+AppKey = Tuple[str, str]
+EMPTY: AbstractSet = frozenset()
+
+
+class AppRecord(NamedTuple):
+    """
+    Immutable app record shared by every device that has the same app id and version installed.
+
+    *Attributes
+        id: str
+        type: str
+        subtype: str | None
+        version: str
+        name: str
+    """
+    id: str
+    type: str
+    subtype: Union[None, str]
+    version: str
+    name: str
+
+
+class AppCatalog:
+    """
+    Fleet-level app catalog. Interns app records and their strings once and keeps inverted indexes between apps and
+    devices. Adding a device replaces its Roku.apps list with entries shared by every device that has the same app,
+    version and active state, so per-device app data shrinks to a list of references.
+
+    *Attributes:
+        records (dict[(str, str), AppRecord]): Interned app records keyed by (app id, version).
+        devices_by_app (dict[str, dict[str, set[Roku]]]): app id -> version -> devices with it installed.
+        apps_by_device (dict[Roku, set[AppRecord]]): device -> installed apps.
+        active_by_device (dict[Roku, AppRecord]): device -> active app, for devices with one.
+        shared_apps (dict[(str, str, bool), RokuApp]): (app id, version, active) -> entry shared by Roku.apps lists.
+            Must not be mutated.
+
+    *methods
+        add_device(roku: Roku)
+
+        remove_device(roku: Roku)
+
+        devices_with(app_id: str, version: str | None) -> AbstractSet[Roku]
+
+        apps_on(roku: Roku) -> AbstractSet[AppRecord]
+
+        memory_usage(seen: set[int] | None) -> int
+    """
+    def __init__(self, rokus: Iterable[Roku] = ()):
+        self.records: Dict[AppKey, AppRecord] = {}
+        self.devices_by_app: Dict[str, Dict[str, Set[Roku]]] = {}
+        self.apps_by_device: Dict[Roku, Set[AppRecord]] = {}
+        self.active_by_device: Dict[Roku, AppRecord] = {}
+        self.shared_apps: Dict[Tuple[str, str, bool], RokuApp] = {}
+
+        for roku in rokus:
+            self.add_device(roku)
+
+    def intern_app(self, app: RokuApp) -> AppRecord:
+        """
+        Gets the shared record for an app, creating it on first sight.
+
+        *Args:
+            app (RokuApp): App data from a device.
+
+        *Returns:
+            (AppRecord): Interned record.
+        """
+        key: AppKey = (app['id'], app['version'])
+        record: Union[AppRecord, None] = self.records.get(key, None)
+
+        if record is None:
+            record = AppRecord(
+                id=_intern(app['id']),
+                type=_intern(app['type']),
+                subtype=_intern(app['subtype']),
+                version=_intern(app['version']),
+                name=_intern(app['name'])
+            )
+            self.records[(record.id, record.version)] = record
+
+        return record
+
+    def add_device(self, roku: Roku) -> None:
+        """
+        Indexes a device's apps, replacing anything previously indexed for it, and points its Roku.apps at the
+        shared entries.
+
+        *Args:
+            roku (Roku): Device with fetched app data.
+        """
+        if roku in self.apps_by_device:
+            self.remove_device(roku)
+
+        installed: Set[AppRecord] = set()
+        shared: List[RokuApp] = []
+        for app in roku.apps or []:
+            record: AppRecord = self.intern_app(app)
+            installed.add(record)
+            self.devices_by_app.setdefault(record.id, {}).setdefault(record.version, set()).add(roku)
+            shared.append(self.__shared_app(record, app['active']))
+
+            if app['active']:
+                self.active_by_device[roku] = record
+
+        self.apps_by_device[roku] = installed
+        if roku.apps is not None:
+            roku.apps = shared
+
+    def remove_device(self, roku: Roku) -> None:
+        """
+        Drops a device from every index. Records no longer installed on any device are released.
+
+        *Args:
+            roku (Roku): Previously added device.
+        """
+        self.active_by_device.pop(roku, None)
+
+        for record in self.apps_by_device.pop(roku, set()):
+            versions: Dict[str, Set[Roku]] = self.devices_by_app[record.id]
+            devices: Set[Roku] = versions[record.version]
+            devices.discard(roku)
+
+            if not devices:
+                del versions[record.version]
+                del self.records[(record.id, record.version)]
+                self.shared_apps.pop((record.id, record.version, False), None)
+                self.shared_apps.pop((record.id, record.version, True), None)
+            if not versions:
+                del self.devices_by_app[record.id]
+
+    def devices_with(self, app_id: str, version: Union[str, None] = None) -> AbstractSet[Roku]:
+        """
+        Gets devices that have an app installed.
+
+        *Args:
+            app_id (str): Roku app id.
+            version (str | None): Only match this version, any version when None.
+
+        *Returns:
+            (AbstractSet[Roku]): Matching devices. Must not be mutated by the caller.
+        """
+        versions: Dict[str, Set[Roku]] = self.devices_by_app.get(app_id, {})
+
+        if version is not None:
+            return versions.get(version, EMPTY)
+
+        if len(versions) == 1:
+            return next(iter(versions.values()))
+
+        return set().union(*versions.values())
+
+    def apps_on(self, roku: Roku) -> AbstractSet[AppRecord]:
+        """
+        Gets apps installed on a device.
+
+        *Args:
+            roku (Roku): Previously added device.
+
+        *Returns:
+            (AbstractSet[AppRecord]): Installed apps. Must not be mutated by the caller.
+        """
+        return self.apps_by_device.get(roku, EMPTY)
+
+    def versions_of(self, app_id: str) -> Dict[str, int]:
+        """
+        Gets installed versions of an app with their device counts.
+        """
+        return {version: len(devices) for version, devices in self.devices_by_app.get(app_id, {}).items()}
+
+    def memory_usage(self, seen: Union[Set[int], None] = None) -> int:
+        """
+        Approximate bytes used by the catalog records and indexes, devices themselves are not counted.
+
+        *Args:
+            seen (set[int] | None): Ids of objects already counted elsewhere, e.g. strings shared with Roku.apps.
+        """
+        seen = set() if seen is None else seen
+        seen.update(id(roku) for roku in self.apps_by_device)
+        return sum(deep_sizeof(index, seen) for index in (
+            self.records,
+            self.devices_by_app,
+            self.apps_by_device,
+            self.active_by_device,
+            self.shared_apps
+        ))
+
+    def __shared_app(self, record: AppRecord, active: bool) -> RokuApp:
+        key: Tuple[str, str, bool] = (record.id, record.version, active)
+        app: Union[RokuApp, None] = self.shared_apps.get(key, None)
+
+        if app is None:
+            app = {
+                'id': record.id,
+                'type': record.type,
+                'subtype': record.subtype,
+                'version': record.version,
+                'name': record.name,
+                'active': active
+            }
+            self.shared_apps[key] = app
+
+        return app
+
+
+def memory_report(rokus: Iterable[Roku], catalog: Union[AppCatalog, None] = None) -> Dict[str, int]:
+    """
+    Adds devices to a catalog and measures their app data before and after interning. Parsed and raw ECP data in
+    Roku.data is not counted.
+
+    *Args:
+        rokus (Iterable[Roku]): Devices with fetched app data.
+        catalog (AppCatalog | None): Catalog the devices are added to, a new one when None.
+
+    *Returns:
+        (dict[str, int]): {
+            'before': approximate bytes of every Roku.apps list before interning,
+            'after': approximate bytes of every Roku.apps list and the catalog after interning,
+            'records': number of unique app records,
+            'devices': number of indexed devices
+        }
+    """
+    rokus = list(rokus)
+    catalog = AppCatalog() if catalog is None else catalog
+
+    before: int = _apps_sizeof(rokus, set())
+
+    for roku in rokus:
+        catalog.add_device(roku)
+
+    seen: Set[int] = set()
+    after: int = _apps_sizeof(rokus, seen) + catalog.memory_usage(seen)
+
+    return {
+        'before': before,
+        'after': after,
+        'records': len(catalog.records),
+        'devices': len(catalog.apps_by_device)
+    }
+
+
+def _apps_sizeof(rokus: List[Roku], seen: Set[int]) -> int:
+    return sum(deep_sizeof(roku.apps, seen) for roku in rokus if roku.apps is not None)
+
+
+def deep_sizeof(obj: object, seen: Set[int]) -> int:
+    """
+    Approximate size of an object and everything reachable through builtin containers. Objects whose id is in seen
+    are counted once.
+    """
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size: int = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+
+    return size
@@ -23,7 +23,17 @@ DiscoveryData:
 """
 
 
-class EcpData(TypedDict):
+class EcpCache(TypedDict, total=False):
+    """
+    *Attributes
+        hash: str (hash of the raw body, used to skip re-parsing unchanged responses)
+        fetched: float (time.monotonic() of the last successful request, used for endpoint ttls)
+    """
+    hash: str
+    fetched: float
+
+
+class EcpData(EcpCache):
     """
     *Attributes
         data: dict
@@ -75,6 +85,32 @@ class Player(TypedDict):
     is_live: bool
     format: dict
 
+
+class IconData(TypedDict):
+    """
+    *Attributes
+        content: bytes
+        content_type: str
+    """
+    content: bytes
+    content_type: str
+
+
+class WakeResult(TypedDict):
+    """
+    *Attributes
+        location: str
+        mac: str | None
+        ready: bool
+        time_to_ready: float | None
+        error: str | None
+    """
+    location: str
+    mac: Union[None, str]
+    ready: bool
+    time_to_ready: Union[None, float]
+    error: Union[None, str]
+
 ArgList = argparse.Namespace
 ArgParser = argparse.ArgumentParser
 SocketConnection = socket.socket
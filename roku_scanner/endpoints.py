@@ -0,0 +1,94 @@
+# coding=utf-8
+from typing import Callable, Dict, Iterable, List, NamedTuple, Union
+
+from .custom_types import EcpData, Response
+from .scheduler import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+
+Parser = Callable[[Response, Union[EcpData, None]], EcpData]
+
+
+class Endpoint(NamedTuple):
+    """
+    ECP query endpoint fetched by fetch_all_data().
+
+    *Attributes
+        key: str (key of its result in Roku.data)
+        path: str (ECP path, e.g. query/device-info)
+        parser: Parser | None (parses a successful response given the previous result, None uses parse_response())
+        ttl: float (seconds a successful result is reused without a request, 0 always requests)
+        priority: int (scheduler priority class)
+        default: bool (fetched when fetch_all_data() is not given endpoints)
+    """
+    key: str
+    path: str
+    parser: Union[Parser, None]
+    ttl: float
+    priority: int
+    default: bool
+
+
+ENDPOINTS: Dict[str, Endpoint] = {}
+
+
+def register_endpoint(key: str,
+                      path: str,
+                      parser: Union[Parser, None] = None,
+                      ttl: float = 0,
+                      priority: int = PRIORITY_NORMAL,
+                      default: bool = True) -> Endpoint:
+    """
+    Adds an endpoint to the registry, replacing any endpoint registered under the same key.
+
+    *Args:
+        key (str): Key of its result in Roku.data.
+        path (str): ECP path.
+        parser (Parser | None): Called with the response and previous result, None uses parse_response().
+        ttl (float): Seconds a successful result is reused without a request.
+        priority (int): Scheduler priority class.
+        default (bool): Fetch it with the default endpoints.
+
+    *Returns
+        (Endpoint): Registered endpoint.
+    """
+    endpoint: Endpoint = Endpoint(key, path, parser, ttl, priority, default)
+    ENDPOINTS[key] = endpoint
+
+    return endpoint
+
+
+def get_endpoint(key: str) -> Endpoint:
+    """
+    Gets a registered endpoint by key.
+    """
+    try:
+        return ENDPOINTS[key]
+    except KeyError:
+        raise ValueError(f'Unknown ECP endpoint "{key}", expected one of {", ".join(ENDPOINTS)}.') from None
+
+
+def get_default_endpoints() -> List[Endpoint]:
+    """
+    Gets the endpoints fetched when fetch_all_data() is not given endpoints, in registration order.
+    """
+    return [endpoint for endpoint in ENDPOINTS.values() if endpoint.default]
+
+
+def set_default_endpoints(keys: Iterable[str]) -> None:
+    """
+    Makes keys the endpoints fetched by default.
+    """
+    selected: List[str] = [get_endpoint(key).key for key in keys]
+    for key, endpoint in ENDPOINTS.items():
+        ENDPOINTS[key] = endpoint._replace(default=key in selected)
+
+
+# volatile playback state goes ahead of bulk data. Built-in endpoints are requested on every fetch, unchanged bodies
+# are already cheap since parse_response() skips them, callers opt into ttls by registering the endpoint again
+register_endpoint('device_info', 'query/device-info', priority=PRIORITY_NORMAL)
+register_endpoint('apps', 'query/apps', priority=PRIORITY_LOW)
+register_endpoint('active_app', 'query/active-app', priority=PRIORITY_HIGH)
+register_endpoint('media_player', 'query/media-player', priority=PRIORITY_HIGH)
+# TV and telemetry endpoints, only available on Roku TVs or with developer mode, fetched on request
+register_endpoint('tv_channels', 'query/tv-channels', priority=PRIORITY_LOW, default=False)
+register_endpoint('tv_active_channel', 'query/tv-active-channel', priority=PRIORITY_HIGH, default=False)
+register_endpoint('chanperf', 'query/chanperf', priority=PRIORITY_NORMAL, default=False)
@@ -0,0 +1,325 @@
+# coding=utf-8
+import asyncio
+import re
+
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Set, Tuple, Union
+
+from .custom_types import DiscoveryData, WakeResult
+from .loop import get_background_loop
+from .roku import Roku
+from .tracing import profile_phase
+from .wake import power_on
+
+INDEXED_ATTRIBUTES: Tuple[str, ...] = ('serial_number', 'wifi_mac', 'model_number', 'software_version', 'power_mode')
+DISCOVERY_FIELDS: Tuple[str, ...] = (
+    'Cache-Control', 'ST', 'USN', 'Ext', 'Server', 'LOCATION', 'device-group.roku.com', 'WAKEUP'
+)
+# DeviceInfoAttribute fields of Roku, the remaining attributes hold containers and are not filterable
+ROKU_FIELDS: FrozenSet[str] = frozenset(vars(Roku(location='', discovery_data={}))) - {
+    'apps', 'data', 'discovery_data', 'location', 'player'
+}
+OPERATORS: Tuple[str, ...] = ('!=', '=', '~')
+CLAUSE_PATTERN = re.compile(r'^\s*([\w.\-]+)\s*(!=|=|~)\s*(.*?)\s*$')
+# "and" followed by balanced quotes only, so it is not inside a quoted value
+AND_PATTERN = re.compile(r'\s+and\s+(?=(?:[^\'"]|\'[^\']*\'|"[^"]*")*$)', re.IGNORECASE)
+
+
+class Condition(NamedTuple):
+    """
+    Single clause of a where expression.
+
+    *Attributes
+        field: str
+        op: str (=, != or ~ for contains)
+        value: str
+        discovery: bool (field is read from DiscoveryData and is available before fetching)
+    """
+    field: str
+    op: str
+    value: str
+    discovery: bool
+
+    def matches(self, roku: Roku) -> bool:
+        """
+        Checks the clause against a device.
+        """
+        actual: str = _normalize(_field_value(roku, self))
+        if self.op == '=':
+            return actual == self.value
+        if self.op == '!=':
+            return actual != self.value
+
+        return self.value in actual
+
+
+def parse_where(expression: Union[str, None]) -> List[Condition]:
+    """
+    Parses a where expression into conditions. Clauses are joined with "and", values may be quoted and are
+    compared case-insensitively, "and" inside a quoted value does not split it.
+
+    *Args:
+        expression (str | None): Filter expression.
+
+    *Returns:
+        (list[Condition]): Parsed clauses, empty when expression is None or blank.
+
+    *Raises:
+        ValueError: A clause is malformed or names a field that is neither a device info attribute nor a DiscoveryData
+            field.
+
+    *Example:
+        input: 'Server~9.2 and model_number=3930X and power_mode!=PowerOn'
+    """
+    if expression is None or not expression.strip():
+        return []
+
+    conditions: List[Condition] = []
+    for clause in AND_PATTERN.split(expression.strip()):
+        match: Union[re.Match, None] = CLAUSE_PATTERN.match(clause)
+        if match is None:
+            raise ValueError(f'Invalid where clause "{clause}", expected <field><{"|".join(OPERATORS)}><value>.')
+
+        field, op, value = match.groups()
+        conditions.append(_condition(field, op, value.strip('\'"')))
+
+    return conditions
+
+
+class Fleet:
+    """
+    Collection of Roku devices with hash indexes on common device-info attributes.
+
+    *Attributes:
+        rokus (list[Roku]): Devices in the fleet.
+        indexed_attributes (tuple[str]): Roku attributes that get a hash index.
+        fetch_errors (dict[str, Exception]): Location -> error for devices whose last fetch failed.
+
+    *methods
+        from_discovery(discovered_devices: Iterable[DiscoveryData], where: str | list[Condition]) -> Fleet
+
+        fetch_data(progress: Callable | None)
+
+        afetch_data(progress: Callable | None)
+
+        power_on(broadcast: str, port: int, timeout: float | None) -> list[WakeResult]
+
+        get(attribute: str, value: str) -> list[Roku]
+
+        where(expression: str | list[Condition]) -> Fleet
+
+        reindex()
+    """
+    def __init__(self, rokus: Iterable[Roku] = (), indexed_attributes: Tuple[str, ...] = INDEXED_ATTRIBUTES):
+        self.rokus: List[Roku] = list(rokus)
+        self.indexed_attributes: Tuple[str, ...] = indexed_attributes
+        self.fetch_errors: Dict[str, Exception] = {}
+        self.__indexes: Union[Dict[str, Dict[str, List[int]]], None] = None
+
+    def __iter__(self) -> Iterator[Roku]:
+        return iter(self.rokus)
+
+    def __len__(self) -> int:
+        return len(self.rokus)
+
+    @classmethod
+    def from_discovery(cls, discovered_devices: Iterable[DiscoveryData],
+                       where: Union[str, List[Condition], None] = None) -> 'Fleet':
+        """
+        Creates a fleet of unfetched Roku devices from discovery data. Clauses on DiscoveryData fields are applied
+        here so filtered out devices are never fetched, clauses on device-info attributes are ignored.
+
+        *Args:
+            discovered_devices (Iterable[DiscoveryData]): Discovery data from Scanner.discover().
+            where (str | list[Condition] | None): Filter expression.
+
+        *Returns:
+            (Fleet): Fleet of matching Roku devices.
+        """
+        conditions: List[Condition] = [
+            condition for condition in _conditions(where) if condition.discovery
+        ]
+        rokus: List[Roku] = []
+
+        for device in discovered_devices:
+            server: Union[str, None] = device.get('Server', None)
+            if server is None or 'roku' not in server.lower():
+                continue
+
+            roku_location: Union[str, None] = device.get('LOCATION', None)
+            if roku_location is None:
+                raise Exception('Unable to find LOCATION in device data.')
+
+            roku: Roku = Roku(location=roku_location, discovery_data=device)
+            if all(condition.matches(roku) for condition in conditions):
+                rokus.append(roku)
+
+        return cls(rokus)
+
+    def fetch_data(self, progress: Union[Callable[[Iterable], Iterable], None] = None) -> None:
+        """
+        Fetches data for every device concurrently on the shared background loop and rebuilds the indexes.
+
+        *Args:
+            progress (Callable | None): Optional iterable wrapper for progress reporting, e.g. tqdm.
+        """
+        get_background_loop().run(self.afetch_data(progress))
+
+    async def afetch_data(self, progress: Union[Callable[[Iterable], Iterable], None] = None) -> None:
+        """
+        Async version of fetch_data() for use inside an already running event loop. A device that fails does not stop
+        the others, its error is kept in fetch_errors.
+
+        *Args:
+            progress (Callable | None): Optional iterable wrapper for progress reporting, e.g. tqdm.
+        """
+        self.fetch_errors = {}
+
+        with profile_phase('fetch'):
+            pending: Iterable = asyncio.as_completed([_fetch(roku) for roku in self.rokus])
+            for fetched in (progress(pending) if progress is not None else pending):
+                roku, error = await fetched
+                if error is not None:
+                    self.fetch_errors[roku.location] = error
+
+        self.reindex()
+
+    def power_on(self, broadcast: str = '255.255.255.255', port: int = 9,
+                 timeout: Union[float, None] = None) -> List[WakeResult]:
+        """
+        Wakes every device with Wake-on-LAN and waits until they report PowerOn, see wake.power_on().
+
+        *Returns:
+            (list[WakeResult]): Result per device with its time to ready.
+        """
+        results: List[WakeResult] = power_on(self.rokus, broadcast, port, timeout)
+        self.reindex()
+
+        return results
+
+    def add(self, roku: Roku) -> None:
+        """
+        Adds a device to the fleet and its indexes.
+        """
+        self.rokus.append(roku)
+        if self.__indexes is not None:
+            self.__index(self.__indexes, len(self.rokus) - 1, roku)
+
+    def reindex(self) -> None:
+        """
+        Drops the indexes, they are rebuilt on the next lookup. Needed after device attributes change or rokus is
+        modified directly, use add() to keep the indexes.
+        """
+        self.__indexes = None
+
+    def get(self, attribute: str, value: str) -> List[Roku]:
+        """
+        Looks up devices by attribute value, uses a hash index for indexed attributes.
+
+        *Args:
+            attribute (str): Roku attribute or DiscoveryData field.
+            value (str): Value to match, case-insensitive.
+
+        *Returns:
+            (list[Roku]): Matching devices.
+        """
+        return self.where([_condition(attribute, '=', value)]).rokus
+
+    def where(self, expression: Union[str, List[Condition], None]) -> 'Fleet':
+        """
+        Filters the fleet. Equality clauses on indexed attributes are answered from the indexes, remaining clauses
+        are checked against the candidates.
+
+        *Args:
+            expression (str | list[Condition] | None): Filter expression, see parse_where().
+
+        *Returns:
+            (Fleet): New fleet with matching devices in their original order.
+        """
+        conditions: List[Condition] = _conditions(expression)
+        indexed: List[Condition] = [
+            condition for condition in conditions
+            if condition.op == '=' and not condition.discovery and condition.field in self.indexed_attributes
+        ]
+        candidates: List[Roku] = self.rokus
+
+        if indexed:
+            indexes: Dict[str, Dict[str, List[int]]] = self.__get_indexes()
+            matched: Union[Set[int], None] = None
+            for condition in indexed:
+                hits: Set[int] = set(indexes[condition.field].get(condition.value, ()))
+                matched = hits if matched is None else matched & hits
+            candidates = [self.rokus[position] for position in sorted(matched or ())]
+
+        remaining: List[Condition] = [condition for condition in conditions if condition not in indexed]
+        return Fleet(
+            [roku for roku in candidates if all(condition.matches(roku) for condition in remaining)],
+            self.indexed_attributes
+        )
+
+    def __get_indexes(self) -> Dict[str, Dict[str, List[int]]]:
+        if self.__indexes is None:
+            self.__indexes = {attribute: {} for attribute in self.indexed_attributes}
+            for position, roku in enumerate(self.rokus):
+                self.__index(self.__indexes, position, roku)
+
+        return self.__indexes
+
+    def __index(self, indexes: Dict[str, Dict[str, List[int]]], position: int, roku: Roku) -> None:
+        for attribute in self.indexed_attributes:
+            value: str = _normalize(getattr(roku, attribute, None))
+            indexes[attribute].setdefault(value, []).append(position)
+
+
+async def _fetch(roku: Roku) -> Tuple[Roku, Union[Exception, None]]:
+    try:
+        await roku.afetch_data()
+    except Exception as e:
+        return roku, e
+
+    return roku, None
+
+
+def _condition(field: str, op: str, value: str) -> Condition:
+    discovery_field: Union[str, None] = _discovery_field(field)
+    if discovery_field is None:
+        field = field.replace('-', '_')
+        if field not in ROKU_FIELDS:
+            raise ValueError(
+                f'Unknown field "{field}", expected a device info attribute or one of {", ".join(DISCOVERY_FIELDS)}.'
+            )
+
+    return Condition(
+        field=discovery_field if discovery_field is not None else field,
+        op=op,
+        value=_normalize(value),
+        discovery=discovery_field is not None
+    )
+
+
+def _conditions(where: Union[str, List[Condition], None]) -> List[Condition]:
+    if where is None or isinstance(where, str):
+        return parse_where(where)
+
+    return where
+
+
+def _discovery_field(field: str) -> Union[str, None]:
+    for discovery_field in DISCOVERY_FIELDS:
+        if discovery_field.lower() == field.lower():
+            return discovery_field
+
+    return None
+
+
+def _field_value(roku: Roku, condition: Condition) -> object:
+    if condition.discovery:
+        return roku.discovery_data.get(condition.field, None)
+
+    return getattr(roku, condition.field, None)
+
+
+def _normalize(value: object) -> str:
+    if value is None:
+        return ''
+
+    return str(value).lower()
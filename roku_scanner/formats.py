@@ -0,0 +1,279 @@
+# coding=utf-8
+import gzip
+import io
+import json
+
+from types import ModuleType
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .custom_types import PathType
+from .roku import Roku
+from .tracing import span
+
+msgpack: Optional[ModuleType]
+try:
+    import msgpack  # type: ignore
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+cbor2: Optional[ModuleType]
+try:
+    import cbor2  # type: ignore
+except ImportError:  # pragma: no cover
+    cbor2 = None
+
+zstandard: Optional[ModuleType]
+try:
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+"""
+Dump layout
+
+A dump is a stream of records in a single encoding, one map per device as returned by Roku.as_dict(). Every record is
+a map, so the encoding is detected from the first byte: json lines ({), msgpack (fixmap/map16/map32) or cbor (map).
+Any dump may be wrapped in gzip or zstd, detected from the stream magic bytes.
+"""
+
+FORMATS: Tuple[str, ...] = ('jsonl', 'msgpack', 'cbor')
+COMPRESSIONS: Tuple[str, ...] = ('gzip', 'zstd')
+GZIP_MAGIC: bytes = b'\x1f\x8b'
+ZSTD_MAGIC: bytes = b'\x28\xb5\x2f\xfd'
+Target = Union[str, PathType, BinaryIO]
+
+
+class OutputStream:
+    """
+    Binary output stream with optional compression. Closing it flushes the compressor and closes the target only
+    when it was opened from a path, streams passed in such as sys.stdout.buffer are left open.
+
+    *methods
+        write(data: bytes) -> int
+
+        flush()
+
+        close()
+    """
+    def __init__(self, target: Target, compression: Union[str, None] = None):
+        self.__owned: bool = isinstance(target, (str, PathType))
+        self.__target: BinaryIO = open(target, 'wb') if isinstance(target, (str, PathType)) else target
+        self.__compressor: Union[BinaryIO, None] = None
+
+        if compression == 'gzip':
+            self.__compressor = gzip.GzipFile(fileobj=self.__target, mode='wb')  # type: ignore
+        elif compression == 'zstd':
+            self.__compressor = _require(zstandard, 'zstandard', 'zstd').ZstdCompressor().stream_writer(
+                self.__target,
+                closefd=False
+            )
+        elif compression is not None:
+            raise ValueError(f'Unknown compression "{compression}", expected one of {", ".join(COMPRESSIONS)}.')
+
+    def __enter__(self) -> 'OutputStream':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(self, data: bytes) -> int:
+        if self.__compressor is not None:
+            return self.__compressor.write(data)
+
+        return self.__target.write(data)
+
+    def flush(self) -> None:
+        if self.__compressor is not None:
+            self.__compressor.flush()
+
+        self.__target.flush()
+
+    def close(self) -> None:
+        if self.__compressor is not None:
+            self.__compressor.close()
+
+        if self.__owned:
+            self.__target.close()
+        else:
+            self.__target.flush()
+
+
+def open_output(target: Target, compression: Union[str, None] = None) -> OutputStream:
+    """
+    Opens a binary stream for writing, optionally compressing everything written to it.
+
+    *Args:
+        target (str | PathType | BinaryIO): File path or an already open binary stream, e.g. sys.stdout.buffer.
+        compression (str | None): gzip, zstd or None.
+
+    *Returns:
+        (OutputStream): Stream to write to.
+    """
+    return OutputStream(target, compression)
+
+
+def open_input(stream: BinaryIO) -> BinaryIO:
+    """
+    Wraps a binary stream for reading, transparently decompressing gzip and zstd.
+
+    *Args:
+        stream (BinaryIO): Open binary stream.
+
+    *Returns:
+        (BinaryIO): Decompressed stream.
+    """
+    buffered: io.BufferedReader = _buffered(stream)
+    magic: bytes = buffered.peek(4)[:4]
+
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=buffered, mode='rb')  # type: ignore
+    if magic.startswith(ZSTD_MAGIC):
+        reader: BinaryIO = _require(zstandard, 'zstandard', 'zstd').ZstdDecompressor().stream_reader(
+            buffered,
+            closefd=False
+        )
+        return reader
+
+    return buffered  # type: ignore
+
+
+class DumpWriter:
+    """
+    Streams devices into a dump one record at a time.
+
+    *Attributes:
+        format (str): jsonl, msgpack or cbor.
+        exclude (list[str] | None): ECP data left out of every record.
+        include_xml (bool): Keep raw ECP XML in records.
+        count (int): Devices written.
+
+    *methods
+        write(roku: Roku)
+
+        close()
+    """
+    def __init__(self, target: Target, format: str = 'msgpack', compression: Union[str, None] = None,
+                 exclude: Union[List[str], None] = None, include_xml: bool = False):
+        self.format: str = format
+        self.exclude: Union[List[str], None] = exclude
+        self.include_xml: bool = include_xml
+        self.count: int = 0
+        self.__encode: Callable[[Any], bytes] = _encoder(format)
+        self.__stream: OutputStream = open_output(target, compression)
+
+    def __enter__(self) -> 'DumpWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(self, roku: Roku) -> None:
+        """
+        Appends a device to the dump.
+        """
+        with span('serialize', device=roku.location, usn=roku.discovery_data.get('USN', None), format=self.format):
+            self.__stream.write(self.__encode(roku.as_dict(self.exclude, self.include_xml)))
+        self.count += 1
+
+    def close(self) -> None:
+        """
+        Flushes and closes the dump.
+        """
+        self.__stream.close()
+
+
+def dump(rokus: Iterable[Roku], target: Target, format: str = 'msgpack', compression: Union[str, None] = None,
+         exclude: Union[List[str], None] = None, include_xml: bool = False) -> int:
+    """
+    Writes devices into a dump, see DumpWriter.
+
+    *Returns:
+        (int): Devices written.
+    """
+    with DumpWriter(target, format, compression, exclude, include_xml) as writer:
+        for roku in rokus:
+            writer.write(roku)
+
+    return writer.count
+
+
+def load_dump(source: Target) -> Iterator[Roku]:
+    """
+    Reads devices back from a dump, the encoding and compression are detected.
+
+    *Args:
+        source (str | PathType | BinaryIO): Dump file path or binary stream. Streams passed in are not closed.
+
+    *Returns:
+        (Iterator[Roku]): Devices with their data loaded, no requests are made.
+    """
+    if isinstance(source, (str, PathType)):
+        with open(source, 'rb') as f:
+            yield from load_dump(f)
+        return
+
+    for record in iter_records(open_input(source)):
+        yield Roku.from_dict(record)
+
+
+def iter_records(stream: BinaryIO) -> Iterator[dict]:
+    """
+    Decodes records from a decompressed dump stream.
+    """
+    buffered: io.BufferedReader = _buffered(stream)
+    first: bytes = buffered.peek(1)[:1]
+    if not first:
+        return
+
+    format: str = detect_format(first[0])
+
+    if format == 'jsonl':
+        for line in buffered:
+            if line.strip():
+                yield json.loads(line)
+    elif format == 'msgpack':
+        yield from _require(msgpack, 'msgpack', 'msgpack').Unpacker(buffered, raw=False)
+    else:
+        decoder = _require(cbor2, 'cbor2', 'cbor').CBORDecoder(buffered)
+        while buffered.peek(1)[:1]:
+            yield decoder.decode()
+
+
+def detect_format(first_byte: int) -> str:
+    """
+    Detects a dump encoding from the first byte of its first record.
+    """
+    if first_byte == ord('{'):
+        return 'jsonl'
+    if 0x80 <= first_byte <= 0x8f or first_byte in (0xde, 0xdf):
+        return 'msgpack'
+    if 0xa0 <= first_byte <= 0xbf:
+        return 'cbor'
+
+    raise ValueError(f'Unrecognized dump encoding, first byte 0x{first_byte:02x}.')
+
+
+def _encoder(format: str) -> Callable[[Any], bytes]:
+    if format == 'jsonl':
+        return lambda record: json.dumps(record, separators=(',', ':')).encode('utf8') + b'\n'
+    if format == 'msgpack':
+        packer = _require(msgpack, 'msgpack', 'msgpack').Packer()
+        return packer.pack  # type: ignore
+    if format == 'cbor':
+        return _require(cbor2, 'cbor2', 'cbor').dumps  # type: ignore
+
+    raise ValueError(f'Unknown format "{format}", expected one of {", ".join(FORMATS)}.')
+
+
+def _buffered(stream: BinaryIO) -> io.BufferedReader:
+    if hasattr(stream, 'peek'):
+        return stream  # type: ignore
+
+    return io.BufferedReader(stream)  # type: ignore
+
+
+def _require(module: Any, package: str, feature: str) -> Any:
+    if module is None:
+        raise ImportError(f'{feature} support requires the {package} package, pip3 install roku-scanner[{feature}]')
+
+    return module
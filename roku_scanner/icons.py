@@ -0,0 +1,294 @@
+# coding=utf-8
+import asyncio
+import hashlib
+import json
+import os
+import requests
+
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from .custom_types import IconData, PathType, Response
+from .loop import get_background_loop
+from .roku import Roku, ecp_get
+from .scheduler import PRIORITY_LOW
+
+AppKey = Tuple[str, str]
+
+
+class IconCache:
+    """
+    Content-addressed on-disk store for app icons. Icons are stored once per unique content digest and looked up
+    by (app id, version), so identical icons from any number of devices share a single file.
+
+    *Attributes:
+        cache_dir (PathType): Root directory of the cache.
+        max_bytes (int): Total size of stored icons before the least recently used ones are evicted.
+
+    *Note:
+        layout
+            {cache_dir}/index.json                  (app id, version) -> digest, content type
+            {cache_dir}/objects/{digest[:2]}/{digest}
+    """
+    def __init__(self, cache_dir: Union[str, PathType], max_bytes: int = 64 * 1024 * 1024):
+        self.cache_dir: PathType = PathType(cache_dir).expanduser()
+        self.max_bytes: int = max_bytes
+        self.objects_dir: PathType = self.cache_dir / 'objects'
+        self.index_path: PathType = self.cache_dir / 'index.json'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index: Dict[str, Dict[str, str]] = self.__load_index()
+        self.__keys_by_digest: Dict[str, Set[str]] = {}
+        for key, entry in self.index.items():
+            self.__keys_by_digest.setdefault(entry['digest'], set()).add(key)
+        # digest -> size, least recently used first. Built from the objects tree once, kept up to date afterwards
+        self.__lru: 'OrderedDict[str, int]' = self.__scan_objects()
+        self.__size: int = sum(self.__lru.values())
+
+    @staticmethod
+    def index_key(app_id: str, version: str) -> str:
+        """
+        Formats an (app id, version) pair into the key used by the index file.
+        """
+        return f'{app_id}@{version}'
+
+    def object_path(self, digest: str) -> PathType:
+        """
+        Path of the stored icon for a content digest.
+        """
+        return self.objects_dir / digest[:2] / digest
+
+    def get(self, app_id: str, version: str) -> Union[IconData, None]:
+        """
+        Looks up a cached icon.
+
+        *Args:
+            app_id (str): Roku app id.
+            version (str): Roku app version.
+
+        *Returns:
+            (IconData | None): Icon content and its content type or None on a miss. Icons are a few KB, so they are
+                read into memory, a memory map would keep a file descriptor open per returned icon.
+        """
+        key: str = self.index_key(app_id, version)
+        entry: Union[Dict[str, str], None] = self.index.get(key, None)
+        if entry is None:
+            return None
+
+        path: PathType = self.object_path(entry['digest'])
+        try:
+            content: bytes = path.read_bytes()
+        except FileNotFoundError:
+            self.__forget(entry['digest'])
+            self.save_index()
+            return None
+
+        # mtime persists last-used time for the next run, atime is unreliable on noatime mounts
+        os.utime(path)
+        if entry['digest'] in self.__lru:
+            self.__lru.move_to_end(entry['digest'])
+
+        return {
+            'content': content,
+            'content_type': entry['content_type']
+        }
+
+    def put(self, app_id: str, version: str, content: bytes, content_type: str = 'image/png',
+            save_index: bool = True) -> str:
+        """
+        Stores an icon and indexes it under (app id, version).
+
+        *Args:
+            app_id (str): Roku app id.
+            version (str): Roku app version.
+            content (bytes): Raw icon bytes.
+            content_type (str): Content type returned by the device.
+            save_index (bool): Write the index file, batch callers pass False and call save_index() once.
+
+        *Returns:
+            (str): Content digest the icon is stored under.
+        """
+        digest: str = hashlib.sha256(content).hexdigest()
+        path: PathType = self.object_path(digest)
+
+        if digest in self.__lru:
+            os.utime(path)
+            self.__lru.move_to_end(digest)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path: PathType = path.with_suffix('.tmp')
+            with tmp_path.open('wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            self.__lru[digest] = len(content)
+            self.__size += len(content)
+
+        key: str = self.index_key(app_id, version)
+        previous: Union[Dict[str, str], None] = self.index.get(key, None)
+        if previous is not None:
+            self.__keys_by_digest.get(previous['digest'], set()).discard(key)
+        self.index[key] = {
+            'digest': digest,
+            'content_type': content_type
+        }
+        self.__keys_by_digest.setdefault(digest, set()).add(key)
+
+        self.evict(keep=digest)
+        if save_index:
+            self.save_index()
+
+        return digest
+
+    def size(self) -> int:
+        """
+        Total bytes of stored icons.
+        """
+        return self.__size
+
+    def evict(self, keep: Union[str, None] = None) -> List[str]:
+        """
+        Removes least recently used icons until the cache fits in max_bytes.
+
+        *Args:
+            keep (str | None): Digest that is never evicted, used to protect an icon that was just stored.
+
+        *Returns:
+            (list[str]): Digests that were evicted.
+        """
+        evicted: List[str] = []
+        while self.__size > self.max_bytes:
+            # only the oldest entries are looked at, keep is usually the newest
+            digest: Union[str, None] = next((candidate for candidate in self.__lru if candidate != keep), None)
+            if digest is None:
+                break
+
+            try:
+                self.object_path(digest).unlink()
+            except FileNotFoundError:
+                pass
+            self.__forget(digest)
+            evicted.append(digest)
+
+        return evicted
+
+    def save_index(self) -> None:
+        """
+        Writes the index file.
+        """
+        tmp_path: PathType = self.index_path.with_suffix('.tmp')
+        with tmp_path.open('w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def __forget(self, digest: str) -> None:
+        self.__size -= self.__lru.pop(digest, 0)
+        for key in self.__keys_by_digest.pop(digest, set()):
+            del self.index[key]
+
+    def __scan_objects(self) -> 'OrderedDict[str, int]':
+        objects: List[Tuple[float, str, int]] = []
+        for path in self.objects_dir.glob('*/*'):
+            if path.suffix == '.tmp':
+                continue
+            stat: os.stat_result = path.stat()
+            objects.append((stat.st_mtime, path.name, stat.st_size))
+
+        return OrderedDict((digest, size) for _mtime, digest, size in sorted(objects))
+
+    def __load_index(self) -> Dict[str, Dict[str, str]]:
+        if not self.index_path.exists():
+            return {}
+
+        try:
+            with self.index_path.open('r') as f:
+                index: Dict[str, Dict[str, str]] = json.load(f)
+                return index
+        except ValueError:
+            return {}
+
+
+class IconFetcher:
+    """
+    Fetches app icons through an IconCache, requesting each (app id, version) once from any device that has it.
+
+    *Attributes:
+        cache (IconCache): Cache icons are served from and stored to.
+        fetched (int): Number of icons downloaded from devices.
+        hits (int): Number of icons served from the cache.
+    """
+    def __init__(self, cache: IconCache):
+        self.cache: IconCache = cache
+        self.fetched: int = 0
+        self.hits: int = 0
+
+    def fetch_icons(self, rokus: Iterable[Roku]) -> Dict[AppKey, IconData]:
+        """
+        Gets icons for every app installed on the given devices. Runs on the shared background event loop, see
+        afetch_icons().
+
+        *Args:
+            rokus (Iterable[Roku]): Devices with fetched app data.
+
+        *Returns:
+            (dict[(str, str), IconData]): Icons keyed by (app id, version). Apps no device could serve are left out.
+        """
+        return get_background_loop().run(self.afetch_icons(rokus))
+
+    async def afetch_icons(self, rokus: Iterable[Roku]) -> Dict[AppKey, IconData]:
+        """
+        Async version of fetch_icons(). Missing icons are requested concurrently through the request scheduler and
+        the cache index is written once at the end.
+        """
+        sources: Dict[AppKey, List[str]] = {}
+        for roku in rokus:
+            for app in roku.apps or []:
+                sources.setdefault((app['id'], app['version']), []).append(roku.location)
+
+        app_keys: List[AppKey] = list(sources.keys())
+        try:
+            results: List[Union[IconData, None]] = await asyncio.gather(*[
+                self.afetch_icon(app_id, version, sources[(app_id, version)], save_index=False)
+                for app_id, version in app_keys
+            ])
+        finally:
+            self.cache.save_index()
+
+        return {app_key: icon for app_key, icon in zip(app_keys, results) if icon is not None}
+
+    def fetch_icon(self, app_id: str, version: str, locations: List[str]) -> Union[IconData, None]:
+        """
+        Gets a single icon from the cache or from the first device in locations that returns it.
+
+        *Args:
+            app_id (str): Roku app id.
+            version (str): Roku app version.
+            locations (list[str]): Devices known to have the app installed.
+
+        *Returns:
+            (IconData | None): Icon or None if no device could serve it.
+        """
+        return get_background_loop().run(self.afetch_icon(app_id, version, locations))
+
+    async def afetch_icon(self, app_id: str, version: str, locations: List[str],
+                          save_index: bool = True) -> Union[IconData, None]:
+        """
+        Async version of fetch_icon(). Icons are requested with ecp_get() so they share the connection pool,
+        timeouts, scheduling and record/replay with every other ECP request.
+        """
+        icon: Union[IconData, None] = self.cache.get(app_id, version)
+        if icon is not None:
+            self.hits += 1
+            return icon
+
+        for location in locations:
+            try:
+                resp: Response = await ecp_get(location, f'query/icon/{app_id}', PRIORITY_LOW)
+            except requests.exceptions.RequestException:
+                continue
+
+            if resp.status_code == requests.codes.ok and resp.content:
+                content_type: str = resp.headers.get('Content-Type', 'image/png')
+                self.cache.put(app_id, version, resp.content, content_type, save_index)
+                self.fetched += 1
+                return self.cache.get(app_id, version)
+
+        return None
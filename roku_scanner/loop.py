@@ -0,0 +1,85 @@
+# coding=utf-8
+import asyncio
+import atexit
+import threading
+
+from typing import Any, Coroutine, TypeVar, Union
+
+T = TypeVar('T')
+
+
+class BackgroundLoop:
+    """
+    Long-lived event loop running in a daemon thread. Lets sync code run coroutines without creating and tearing down
+    an event loop per call, and works while the calling thread has its own loop running.
+
+    *Attributes:
+        loop (asyncio.AbstractEventLoop): The event loop.
+        thread (threading.Thread): Thread running the loop.
+
+    *methods
+        run(coro: Coroutine[Any, Any, T]) -> T
+
+        close()
+    """
+    def __init__(self):
+        self.loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        self.thread: threading.Thread = threading.Thread(
+            target=self.__run_forever,
+            name='roku-scanner-loop',
+            daemon=True
+        )
+        self.thread.start()
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """
+        Runs a coroutine on the loop and blocks until it finishes.
+
+        *Args:
+            coro (Coroutine): Coroutine to run.
+
+        *Returns:
+            Result of the coroutine, exceptions are re-raised in the calling thread.
+        """
+        if threading.current_thread() is self.thread:
+            raise RuntimeError(
+                'BackgroundLoop.run() cannot be called from the loop thread, await the coroutine instead.'
+            )
+
+        if self.loop.is_closed():
+            raise RuntimeError('BackgroundLoop is closed.')
+
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def close(self) -> None:
+        """
+        Stops the loop and waits for its thread to exit.
+        """
+        if self.loop.is_closed():
+            return
+
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def __run_forever(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+
+_background_loop: Union[BackgroundLoop, None] = None
+_background_loop_lock: threading.Lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """
+    Gets the shared background loop, starting it on first use.
+    """
+    global _background_loop
+
+    with _background_loop_lock:
+        if _background_loop is None or _background_loop.loop.is_closed():
+            _background_loop = BackgroundLoop()
+            atexit.register(_background_loop.close)
+
+        return _background_loop
@@ -0,0 +1,244 @@
+# coding=utf-8
+import asyncio
+import base64
+import gzip
+import json
+import threading
+import time
+
+import requests
+
+from typing import TYPE_CHECKING, Dict, List, Tuple, Union
+
+from .custom_types import DiscoveryData, PathType
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .scanner import Scanner
+
+"""
+Trace file layout
+
+gzip compressed JSON lines. The first line is a header, every following line is one event with its offset in seconds
+from the start of the recording.
+
+    {"type": "header", "version": 1, "started": 1760000000.0}
+    {"type": "ssdp", "t": 0.012, "data": "<base64 datagram>"}
+    {"type": "ecp", "t": 2.301, "location": "http://192.168.1.20:8060/", "path": "query/apps", "status": 200,
+     "elapsed": 0.084, "content_type": "text/xml", "body": "<?xml ..."}
+    {"type": "ecp", "t": 2.402, "location": "...", "path": "...", "elapsed": 10.0, "error": "ConnectionError: ..."}
+"""
+
+TRACE_VERSION: int = 1
+
+
+class TraceRecorder:
+    """
+    Records raw SSDP datagrams and ECP responses with their timings into a trace file.
+
+    *Attributes:
+        path (PathType): Trace file.
+        events (int): Events recorded.
+
+    *methods
+        record_datagram(data: bytes)
+
+        record_response(location: str, path: str, resp: Response, elapsed: float)
+
+        record_error(location: str, path: str, error: Exception, elapsed: float)
+
+        close()
+    """
+    def __init__(self, path: Union[str, PathType]):
+        self.path: PathType = PathType(path)
+        self.events: int = 0
+        self.__started: float = time.monotonic()
+        self.__lock: threading.Lock = threading.Lock()
+        self.__file = gzip.open(self.path, 'wt', encoding='utf8')
+        self.__write({'type': 'header', 'version': TRACE_VERSION, 'started': time.time()})
+
+    def __enter__(self) -> 'TraceRecorder':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def record_datagram(self, data: bytes) -> None:
+        """
+        Records a datagram received during discovery.
+        """
+        self.__record({'type': 'ssdp', 'data': base64.b64encode(data).decode('ascii')})
+
+    def record_response(self, location: str, path: str, resp: requests.Response, elapsed: float) -> None:
+        """
+        Records an ECP response body and how long the request took.
+        """
+        event: dict = {
+            'type': 'ecp',
+            'location': location,
+            'path': path,
+            'status': resp.status_code,
+            'elapsed': round(elapsed, 6),
+            'content_type': resp.headers.get('Content-Type', None)
+        }
+        try:
+            event['body'] = resp.content.decode('utf8')
+        except UnicodeDecodeError:
+            event['body_b64'] = base64.b64encode(resp.content).decode('ascii')
+
+        self.__record(event)
+
+    def record_error(self, location: str, path: str, error: Exception, elapsed: float) -> None:
+        """
+        Records an ECP request that failed without a response.
+        """
+        self.__record({
+            'type': 'ecp',
+            'location': location,
+            'path': path,
+            'elapsed': round(elapsed, 6),
+            'error': f'{type(error).__name__}: {error}'
+        })
+
+    def close(self) -> None:
+        """
+        Flushes and closes the trace file.
+        """
+        with self.__lock:
+            if not self.__file.closed:
+                self.__file.close()
+
+    def __record(self, event: dict) -> None:
+        event['t'] = round(time.monotonic() - self.__started, 6)
+        with self.__lock:
+            self.__write(event)
+            self.events += 1
+
+    def __write(self, event: dict) -> None:
+        self.__file.write(json.dumps(event, separators=(',', ':')) + '\n')
+
+
+class RecordedResponse:
+    """
+    Stands in for requests.Response when replaying, carries the attributes the fetch functions use.
+    """
+    def __init__(self, status_code: int, content: bytes, content_type: Union[str, None]):
+        self.status_code: int = status_code
+        self.content: bytes = content
+        self.headers: Dict[str, str] = {'Content-Type': content_type} if content_type is not None else {}
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf8', errors='replace')
+
+
+class TracePlayer:
+    """
+    Replays a trace file through Scanner.parse_data(), the ECP parsers and the output writers without touching the
+    network.
+
+    *Attributes:
+        speed (float): Timing factor, 1.0 replays original timing, 2.0 twice as fast, 0 without any waiting.
+        datagrams (list[(float, bytes)]): Recorded SSDP datagrams with their offsets.
+        responses (dict[(str, str), list[dict]]): Recorded ECP events per (location, path) in order.
+
+    *methods
+        load(path: str | PathType, speed: float) -> TracePlayer
+
+        discover(scanner: Scanner, verbose: bool) -> list[DiscoveryData]
+
+        response(location: str, path: str) -> RecordedResponse
+    """
+    def __init__(self, speed: float = 1.0):
+        self.speed: float = speed
+        self.datagrams: List[Tuple[float, bytes]] = []
+        self.responses: Dict[Tuple[str, str], List[dict]] = {}
+        self.__positions: Dict[Tuple[str, str], int] = {}
+
+    @classmethod
+    def load(cls, path: Union[str, PathType], speed: float = 1.0) -> 'TracePlayer':
+        """
+        Reads a trace file.
+        """
+        player: TracePlayer = cls(speed)
+
+        with gzip.open(path, 'rt', encoding='utf8') as f:
+            for line in f:
+                event: dict = json.loads(line)
+                if event['type'] == 'ssdp':
+                    player.datagrams.append((event['t'], base64.b64decode(event['data'])))
+                elif event['type'] == 'ecp':
+                    player.responses.setdefault((event['location'], event['path']), []).append(event)
+
+        return player
+
+    def discover(self, scanner: 'Scanner', verbose: bool = False) -> List[DiscoveryData]:
+        """
+        Feeds recorded datagrams to a scanner as if they were received, keeping their relative timing.
+        """
+        previous: float = self.datagrams[0][0] if self.datagrams else 0.0
+        for offset, data in self.datagrams:
+            if self.speed > 0 and offset > previous:
+                time.sleep((offset - previous) / self.speed)
+            previous = offset
+            scanner.handle_datagram(data, verbose)
+
+        return scanner.discovered_devices
+
+    async def response(self, location: str, path: str) -> RecordedResponse:
+        """
+        Returns the next recorded response for a device and path after its original latency. The last recording is
+        repeated once they run out, so repeated polls keep working.
+        """
+        key: Tuple[str, str] = (location, path)
+        events: Union[List[dict], None] = self.responses.get(key, None)
+        if not events:
+            raise requests.exceptions.ConnectionError(f'No recorded response for {location}{path}')
+
+        position: int = self.__positions.get(key, 0)
+        self.__positions[key] = position + 1
+        event: dict = events[min(position, len(events) - 1)]
+
+        if self.speed > 0 and event['elapsed'] > 0:
+            await asyncio.sleep(event['elapsed'] / self.speed)
+
+        if 'error' in event:
+            raise requests.exceptions.ConnectionError(event['error'])
+
+        content: bytes = (
+            event['body'].encode('utf8') if 'body' in event else base64.b64decode(event['body_b64'])
+        )
+        return RecordedResponse(event['status'], content, event.get('content_type', None))
+
+
+_recorder: Union[TraceRecorder, None] = None
+_player: Union[TracePlayer, None] = None
+
+
+def get_recorder() -> Union[TraceRecorder, None]:
+    """
+    Gets the active recorder, None when not recording.
+    """
+    return _recorder
+
+
+def set_recorder(recorder: Union[TraceRecorder, None]) -> None:
+    """
+    Starts recording into recorder, None stops recording.
+    """
+    global _recorder
+    _recorder = recorder
+
+
+def get_player() -> Union[TracePlayer, None]:
+    """
+    Gets the active player, None when not replaying.
+    """
+    return _player
+
+
+def set_player(player: Union[TracePlayer, None]) -> None:
+    """
+    Serves every ECP request from player, None goes back to the network.
+    """
+    global _player
+    _player = player
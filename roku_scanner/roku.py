@@ -1,13 +1,23 @@
 # coding=utf-8
 import asyncio
+import functools
+import hashlib
 import json
+import sys
+import time
 import requests
+import requests.adapters
 import xmltodict  # type: ignore
 
 from collections import OrderedDict
-from typing import List, Dict, Union
+from typing import Awaitable, Iterable, List, Dict, Union, cast, overload
 
 from .custom_types import DeviceInfoAttribute, DiscoveryData, EcpData, Player, Response, RokuApp, Task
+from .endpoints import Endpoint, Parser, get_default_endpoints, get_endpoint
+from .loop import get_background_loop
+from .recording import TracePlayer, TraceRecorder, get_player, get_recorder
+from .scheduler import PRIORITY_NORMAL, RequestScheduler, get_scheduler
+from .tracing import span
 
 
 class Roku:
@@ -88,6 +98,14 @@ class Roku:
     *methods
         fetch_data()
 
+        afetch_data()
+
+        load_data(data: dict)
+
+        as_dict(exclude: List[str], include_xml: bool) -> dict
+
+        from_dict(device: dict) -> Roku
+
         as_json(exclude: List[str]) -> str
 
         as_xml(exclude: List[str]) -> str
@@ -165,24 +183,51 @@ class Roku:
 
     def fetch_data(self) -> None:
         """
-        Intermediary function to request further device data from fetch_all_data()
+        Intermediary function to request further device data from fetch_all_data(). Runs on the shared background
+        event loop so repeated calls reuse one loop and its connection pool, and it is safe to call while another
+        event loop is running in the calling thread.
         """
-        self.data = asyncio.run(fetch_all_data(self.location))
+        get_background_loop().run(self.afetch_data())
+
+    async def afetch_data(self) -> None:
+        """
+        Async version of fetch_data() for use inside an already running event loop.
+        """
+        with span('device.fetch', device=self.location, usn=self.discovery_data.get('USN', None)):
+            data: dict = await fetch_all_data(self.location, self.data)
+
+            with span('device.populate'):
+                self.load_data(data)
+
+    def load_data(self, data: dict) -> None:
+        """
+        Sets data and all attributes from fetched ECP data. Attributes are only set again for ECP data that changed
+        since the last load, fetch_all_data() returns unchanged responses as the same objects.
+
+        *Args:
+            data (dict): Data in the form returned by fetch_all_data()
+        """
+        previous: dict = self.data
+        self.data = data
         device_info: dict = self.data.get('device_info', None)
         apps: dict = self.data.get('apps', None)
-        active_app: Union[None, OrderedDict] = self.data.get('active_app', None)
-        media_player: Union[dict, OrderedDict] = self.data.get('media_player', None)
+        active_app: Union[None, dict] = self.data.get('active_app', None)
+        media_player: Union[None, dict] = self.data.get('media_player', None)
+
+        def changed(key: str) -> bool:
+            return previous.get(key, None) is not self.data.get(key, None)
 
-        if device_info is not None and isinstance(device_info['data'], OrderedDict):
+        if device_info is not None and isinstance(device_info.get('data', None), dict) and changed('device_info'):
             self.__set_device_info_attributes(device_info['data']['device-info'])
 
-        if apps is not None and isinstance(apps['data'], OrderedDict):
-            if active_app is not None and isinstance(active_app['data'], OrderedDict):
+        if apps is not None and isinstance(apps.get('data', None), dict) and (changed('apps') or changed('active_app')):
+            if active_app is not None and isinstance(active_app.get('data', None), dict):
                 active_app = active_app['data']['active-app']['app']
 
-            self.__set_apps(apps['data']['apps']['app'], active_app)
+            app_list: Union[list, dict] = apps['data']['apps']['app']
+            self.__set_apps(app_list if isinstance(app_list, list) else [app_list], active_app)
 
-        if media_player is not None and isinstance(media_player['data'], OrderedDict):
+        if media_player is not None and isinstance(media_player.get('data', None), dict) and changed('media_player'):
             self.__set_player_data(media_player['data']['player'])
 
     def __set_device_info_attributes(self, device_info: OrderedDict) -> None:
@@ -203,31 +248,32 @@ class Roku:
                     else:
                         setattr(self, obj_key, val)
 
-    def __set_apps(self, apps: list, active_app: Union[OrderedDict, None]) -> None:
+    def __set_apps(self, apps: list, active_app: Union[dict, None]) -> None:
         """
-        Sets apps attributes with corresponding ECP apps data
+        Sets apps attributes with corresponding ECP apps data. Strings are interned since the same ids, names and
+        versions repeat across every device in a fleet.
 
         *Args:
             apps (list): List of Roku ECP apps parsed into a dict by xmlToDict
-            active_app (OrderedDict): Roku ECP active app parsed into a dict by xmlToDict
+            active_app (dict | None): Roku ECP active app parsed into a dict by xmlToDict
         """
+        active_app_id: Union[str, None] = None
+        if isinstance(active_app, dict):
+            active_app_id = active_app.get('@id', '')
+
+        self.apps = []
         for app_data in apps:
             app: RokuApp = {
-                'id': app_data.get('@id', None),
-                'type': app_data.get('@type', None),
-                'subtype': app_data.get('@subtype', None),
-                'version': app_data.get('@version', None),
-                'name': app_data.get('#text', None),
+                'id': _intern(app_data.get('@id', None)),
+                'type': _intern(app_data.get('@type', None)),
+                'subtype': _intern(app_data.get('@subtype', None)),
+                'version': _intern(app_data.get('@version', None)),
+                'name': _intern(app_data.get('#text', None)),
                 'active': False
             }
 
-            if isinstance(active_app, OrderedDict):
-                active_app_id: str = active_app.get('@id', '')
-                if active_app_id == app['id']:
-                    app['active'] = True
-
-            if self.apps is None:
-                self.apps = []
+            if active_app_id == app['id']:
+                app['active'] = True
 
             self.apps.append(app)
 
@@ -244,7 +290,7 @@ class Roku:
             'is_live': player_data.get('is_live', False),
             'format': {}
         }
-        if isinstance(player_data.get('format', None), OrderedDict):
+        if isinstance(player_data.get('format', None), dict):
             self.player['format'].update({
                 'audio': player_data['format'].get('@audio', None),
                 'captions': player_data['format'].get('@captions', None),
@@ -252,6 +298,37 @@ class Roku:
                 'video': player_data['format'].get('@video', None),
             })
 
+    def as_dict(self, exclude: Union[list, None] = None, include_xml: bool = False) -> dict:
+        """
+        Formats device data into a plain dict for binary encoders. Raw XML is left out unless include_xml is set since
+        the parsed data is all load_data() needs.
+        """
+        data: dict = {}
+        for data_set in self.data.items():
+            if exclude is not None and data_set[0] in exclude:
+                continue
+
+            ecp_data: dict = {'data': data_set[1].get('data', None)}
+            if include_xml:
+                ecp_data['xml'] = data_set[1].get('xml', None)
+            data[data_set[0]] = ecp_data
+
+        return {
+            'location': self.location,
+            'discovery_data': self.discovery_data,
+            'data': data
+        }
+
+    @classmethod
+    def from_dict(cls, device: dict) -> 'Roku':
+        """
+        Creates a device from the output of as_dict() without making any requests.
+        """
+        roku: Roku = cls(location=device['location'], discovery_data=device['discovery_data'])
+        roku.load_data(device['data'])
+
+        return roku
+
     def as_json(self, exclude: Union[list, None] = None, pretty_format: bool = False) -> str:
         """
         Formats device data into JSON.
@@ -278,7 +355,7 @@ class Roku:
         if pretty_format:
             return json.dumps({device_name: temp}, indent=4, sort_keys=True)
 
-        return json.dumps({device_name: temp})
+        return json.dumps({device_name: temp}, separators=(',', ':'))
 
     def as_xml(self, exclude: Union[list, None] = None) -> str:
         """
@@ -308,14 +385,126 @@ class Roku:
         return temp
 
 
-async def fetch_all_data(roku_location: str) -> dict:
+ECP_TIMEOUT: float = 10.0
+ECP_POOL_SIZE: int = 1024
+# connections kept per device, enough for every built-in endpoint to be in flight at once
+ECP_DEVICE_POOL_SIZE: int = 8
+
+_session: requests.Session = requests.Session()
+_session.mount('http://', requests.adapters.HTTPAdapter(
+    pool_connections=ECP_POOL_SIZE,
+    pool_maxsize=ECP_DEVICE_POOL_SIZE
+))
+
+
+async def ecp_get(roku_location: str, path: str, priority: int = PRIORITY_NORMAL) -> Response:
     """
-    Create async tasks for requesting more data from device.
+    Makes an ECP GET request through the request scheduler and the shared connection pool on the scheduler's executor
+    without blocking the event loop. Responses are recorded when a trace recorder is active and served from the trace
+    when replaying.
 
     *Args:
         roku_location (str): IP address to device.
+        path (str): ECP path, e.g. query/device-info.
+        priority (int): Scheduler priority class, volatile data should go ahead of bulk data.
+
+    *Returns
+        (Response): Device response.
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    scheduler: RequestScheduler = get_scheduler()
+
+    async def send() -> Response:
+        player: Union[TracePlayer, None] = get_player()
+        if player is not None:
+            return await player.response(roku_location, path)  # type: ignore
+
+        recorder: Union[TraceRecorder, None] = get_recorder()
+        start: float = time.monotonic()
+        try:
+            with span('ecp.http') as current:
+                resp: Response = await loop.run_in_executor(scheduler.executor, functools.partial(
+                    _session.get,
+                    f'{roku_location}{path}',
+                    headers={'Content-Type': 'application/xml'},
+                    timeout=ECP_TIMEOUT
+                ))
+                if current is not None:
+                    # time until response headers, covers dns and connect which requests does not expose separately
+                    current.tags.update(status=resp.status_code, headers_received=resp.elapsed.total_seconds())
+        except requests.exceptions.RequestException as e:
+            if recorder is not None:
+                recorder.record_error(roku_location, path, e, time.monotonic() - start)
+            raise
+
+        if recorder is not None:
+            recorder.record_response(roku_location, path, resp, time.monotonic() - start)
+
+        return resp
+
+    with span('ecp.request', device=roku_location, endpoint=path):
+        return await scheduler.request(roku_location, priority, send)
+
+
+def parse_response(resp: Response, previous: Union[EcpData, None] = None) -> EcpData:
+    """
+    Parses an ECP response body. Bodies are hashed first, when the hash matches the previous result for the same
+    device and endpoint that result is returned as is and parsing is skipped.
+
+    *Args:
+        resp (Response): Successful ECP response.
+        previous (EcpData | None): Last result for the same device and endpoint.
+
+    *Returns
+        (EcpData): Parsed data, raw xml and body hash.
+    """
+    with span('ecp.parse', bytes=len(resp.content)) as current:
+        body_hash: str = hashlib.blake2b(resp.content, digest_size=16).hexdigest()
+
+        if previous is not None and previous.get('hash', None) == body_hash:
+            if current is not None:
+                current.tags['unchanged'] = True
+            return previous
+
+        xml_str: str = resp.text
+
+        return {
+            'data': xmltodict.parse(xml_str),
+            'xml': xml_str,
+            'hash': body_hash
+        }
+
+
+@overload
+def _intern(value: str) -> str: ...
+
+
+@overload
+def _intern(value: None) -> None: ...
+
+
+@overload
+def _intern(value: Union[str, None]) -> Union[str, None]: ...
+
+
+def _intern(value: Union[str, None]) -> Union[str, None]:
+    return sys.intern(value) if isinstance(value, str) else value
 
-    *Returns (dict): {
+
+async def fetch_all_data(roku_location: str,
+                         previous: Union[dict, None] = None,
+                         endpoints: Union[Iterable[Union[str, Endpoint]], None] = None) -> dict:
+    """
+    Create async tasks for requesting more data from device. Every endpoint is handed to the request scheduler at
+    once, how many of them are in flight per device is bounded by its per_device_concurrency.
+
+    *Args:
+        roku_location (str): IP address to device.
+        previous (dict | None): Last result of fetch_all_data() for this device, unchanged responses and results
+            within their endpoint's ttl are reused.
+        endpoints (list[str | Endpoint] | None): Endpoints or their keys to fetch, None fetches the default endpoints.
+
+    *Returns (dict): result per endpoint key, by default {
         'device_info': data from {roku_location}:8060/query/device-info
         'apps': data from {roku_location}:8060/query/apps,
         'active_app': data from {roku_location}:8060/query/active-app,
@@ -326,110 +515,120 @@ async def fetch_all_data(roku_location: str) -> dict:
         Roku ECP
         https://developer.roku.com/docs/developer-program/debugging/external-control-api.md
     """
-    device_info: Task = asyncio.create_task(fetch_device_info(roku_location))
-    apps: Task = asyncio.create_task(fetch_apps(roku_location))
-    active_app: Task = asyncio.create_task(fetch_active_app(roku_location))
-    media_player: Task = asyncio.create_task(fetch_media_player(roku_location))
-
-    return {
-        'device_info': await device_info,
-        'apps': await apps,
-        'active_app': await active_app,
-        'media_player': await media_player
-    }
+    if previous is None:
+        previous = {}
 
+    selected: List[Endpoint] = (
+        get_default_endpoints() if endpoints is None
+        else [get_endpoint(endpoint) if isinstance(endpoint, str) else endpoint for endpoint in endpoints]
+    )
+    tasks: List[Task] = [
+        _fetch_task(endpoint.path, fetch_endpoint(roku_location, endpoint, previous.get(endpoint.key, None)))
+        for endpoint in selected
+    ]
 
-async def fetch_device_info(roku_location: str) -> Union[EcpData, Dict[str, str]]:
+    return {endpoint.key: await task for endpoint, task in zip(selected, tasks)}
+
+
+def _fetch_task(endpoint: str, fetch: Awaitable) -> Task:
+    async def traced_fetch():
+        with span('ecp.fetch', endpoint=endpoint):
+            return await fetch
+
+    return asyncio.create_task(traced_fetch())
+
+
+async def fetch_endpoint(roku_location: str,
+                         endpoint: Union[str, Endpoint],
+                         previous: Union[EcpData, None] = None) -> Union[EcpData, Dict[str, str]]:
     """
-    Makes GET request for device info following Roku ECP.
+    Makes GET request for a registered endpoint following Roku ECP and parses it with the endpoint's parser.
 
     *Args:
         roku_location (str): IP address to device.
+        endpoint (str | Endpoint): Endpoint or its key, see endpoints.register_endpoint().
+        previous (EcpData | None): Last result for this device, returned without a request within the endpoint's ttl
+            and as is when the body is unchanged.
 
     *Returns
-        (EcpData): device data in dict form and the raw xml returned or error.
+        (EcpData): endpoint data in dict form and the raw xml returned or error, also when the device is unreachable.
     """
-    resp: Response = requests.get(f'{roku_location}query/device-info', headers={'Content-Type': 'application/xml'})
+    if isinstance(endpoint, str):
+        endpoint = get_endpoint(endpoint)
 
-    if resp.status_code == requests.codes.ok:
-        xml_str: str = resp.text
-        device_data_dict: dict = xmltodict.parse(xml_str)
+    if endpoint.ttl > 0 and previous is not None and 'fetched' in previous:
+        if time.monotonic() - previous['fetched'] < endpoint.ttl:
+            return previous
 
-        return {
-            'data': device_data_dict,
-            'xml': xml_str
-        }
+    try:
+        resp: Response = await ecp_get(roku_location, endpoint.path, endpoint.priority)
+    except requests.exceptions.RequestException:
+        return {'Error': f'Unable to reach device at {roku_location}'}
+
+    if resp.status_code == requests.codes.ok:
+        parser: Parser = endpoint.parser if endpoint.parser is not None else cast(Parser, parse_response)
+        result: EcpData = parser(resp, previous)
+        result['fetched'] = time.monotonic()
+        return result
     else:
         return {'Error': f'Unable to reach device at {roku_location}'}
 
 
-async def fetch_apps(roku_location: str) -> Union[EcpData, Dict[str, str]]:
+async def fetch_device_info(roku_location: str,
+                            previous: Union[EcpData, None] = None) -> Union[EcpData, Dict[str, str]]:
     """
-    Makes GET request for apps following Roku ECP.
+    Makes GET request for device info following Roku ECP.
 
     *Args:
         roku_location (str): IP address to device.
+        previous (EcpData | None): Last result for this device, see fetch_endpoint().
 
     *Returns
-        (EcpData): app data in dict form and the raw xml returned or error.
+        (EcpData): device data in dict form and the raw xml returned or error.
     """
-    resp: Response = requests.get(f'{roku_location}query/apps', headers={'Content-Type': 'application/xml'})
+    return await fetch_endpoint(roku_location, 'device_info', previous)
 
-    if resp.status_code == requests.codes.ok:
-        xml_str: str = resp.text
-        apps_dict: dict = xmltodict.parse(xml_str)
 
-        return {
-            'data': apps_dict,
-            'xml': xml_str
-        }
-    else:
-        return {'Error': f'Unable to reach device at {roku_location}'}
+async def fetch_apps(roku_location: str,
+                     previous: Union[EcpData, None] = None) -> Union[EcpData, Dict[str, str]]:
+    """
+    Makes GET request for apps following Roku ECP.
+
+    *Args:
+        roku_location (str): IP address to device.
+        previous (EcpData | None): Last result for this device, see fetch_endpoint().
 
+    *Returns
+        (EcpData): app data in dict form and the raw xml returned or error.
+    """
+    return await fetch_endpoint(roku_location, 'apps', previous)
 
-async def fetch_active_app(roku_location: str) -> Union[EcpData, Dict[str, str]]:
+
+async def fetch_active_app(roku_location: str,
+                           previous: Union[EcpData, None] = None) -> Union[EcpData, Dict[str, str]]:
     """
     Makes GET request for active-app following Roku ECP.
 
     *Args:
         roku_location (str): IP address to device.
+        previous (EcpData | None): Last result for this device, see fetch_endpoint().
 
     *Returns
         (EcpData): active-app data in dict form and the raw xml returned or error.
     """
-    resp: Response = requests.get(f'{roku_location}query/active-app', headers={'Content-Type': 'application/xml'})
-
-    if resp.status_code == requests.codes.ok:
-        xml_str: str = resp.text
-        active_app_dict: dict = xmltodict.parse(xml_str)
-
-        return {
-            'data': active_app_dict,
-            'xml': xml_str
-        }
-    else:
-        return {'Error': f'Unable to reach device at {roku_location}'}
+    return await fetch_endpoint(roku_location, 'active_app', previous)
 
 
-async def fetch_media_player(roku_location: str) -> Union[EcpData, Dict[str, str]]:
+async def fetch_media_player(roku_location: str,
+                             previous: Union[EcpData, None] = None) -> Union[EcpData, Dict[str, str]]:
     """
     Makes GET request for media player following Roku ECP.
 
     *Args:
         roku_location (str): IP address to device.
+        previous (EcpData | None): Last result for this device, see fetch_endpoint().
 
     *Returns
         (EcpData): media player data in dict form and the raw xml returned or error.
     """
-    resp: Response = requests.get(f'{roku_location}query/media-player', headers={'Content-Type': 'application/xml'})
-
-    if resp.status_code == requests.codes.ok:
-        xml_str: str = resp.text
-        media_player_dict: dict = xmltodict.parse(xml_str)
-
-        return {
-            'data': media_player_dict,
-            'xml': xml_str
-        }
-    else:
-        return {'Error': f'Unable to reach device at {roku_location}'}
+    return await fetch_endpoint(roku_location, 'media_player', previous)
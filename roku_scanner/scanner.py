@@ -1,9 +1,19 @@
 # coding=utf-8
+import select
 import socket
+import struct
+import sys
 from collections import ChainMap
-from typing import Dict, List
+from typing import Dict, List, Union
 
 from .custom_types import DiscoveryData, SocketConnection
+from .recording import TraceRecorder, get_recorder
+from .tracing import span
+
+MAX_DATAGRAM_SIZE: int = 65507
+DEFAULT_RECEIVE_BUFFER_SIZE: int = 4 * 1024 * 1024
+SO_RXQ_OVFL: Union[int, None] = getattr(socket, 'SO_RXQ_OVFL', 40 if sys.platform.startswith('linux') else None)
+DROP_COUNT_SIZE: int = socket.CMSG_SPACE(4) if hasattr(socket, 'CMSG_SPACE') else 0
 
 
 class Scanner:
@@ -14,15 +24,26 @@ class Scanner:
         discovery_timeout (int): Timeout for each device's discovery ping return.
         discovered_devices (list[DiscoveryData]): List of any discovered devices data.
         search_target (str): Determines whether M:Search will search for only Roku or any device UPnP capable. See Note
+        receive_buffer_size (int | None): Requested SO_RCVBUF size, None keeps the system default.
+        received_datagrams (int): Datagrams read from the socket.
+        dropped_datagrams (int): Datagrams the kernel dropped because the receive buffer was full. Linux only, the
+            kernel reports drops with the next datagram queued after them, always 0 where SO_RXQ_OVFL is unavailable.
+        malformed_datagrams (int): Datagrams that could not be parsed.
 
     *Note:
         only rokus: roku:ecp
         all devices: upnp:rootdevice
     """
-    def __init__(self, discovery_timeout: int = 2, search_target: str = 'roku:ecp'):
+    def __init__(self, discovery_timeout: int = 2, search_target: str = 'roku:ecp',
+                 receive_buffer_size: Union[int, None] = DEFAULT_RECEIVE_BUFFER_SIZE):
         self.discovery_timeout: int = discovery_timeout
         self.discovered_devices: list = []
         self.search_target: str = search_target
+        self.receive_buffer_size: Union[int, None] = receive_buffer_size
+        self.received_datagrams: int = 0
+        self.dropped_datagrams: int = 0
+        self.malformed_datagrams: int = 0
+        self.__buffer: bytearray = bytearray(MAX_DATAGRAM_SIZE)
 
     def discover(self, verbose: bool = False) -> List[DiscoveryData]:
         """
@@ -39,32 +60,119 @@ class Scanner:
                             f'\r\n' \
 
         socket_connection: SocketConnection = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
-        socket_connection.settimeout(self.discovery_timeout)
-        socket_connection.sendto(bytes(ssdp_message, 'utf8'), ('239.255.255.250', 1900))
-
         try:
+            self.configure_socket(socket_connection)
+            socket_connection.sendto(bytes(ssdp_message, 'utf8'), ('239.255.255.250', 1900))
+            self.receive(socket_connection, verbose)
+        finally:
+            socket_connection.close()
+
+        return self.discovered_devices
+
+    def configure_socket(self, socket_connection: SocketConnection) -> None:
+        """
+        Makes the socket non-blocking, sizes its receive buffer and turns on kernel drop counting where supported.
+
+        *Args:
+            socket_connection (SocketConnection): UDP socket used for discovery
+        """
+        socket_connection.setblocking(False)
+
+        if self.receive_buffer_size is not None:
+            try:
+                socket_connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer_size)
+            except OSError:
+                # the kernel caps the size at net.core.rmem_max, keep the default when it refuses
+                pass
+
+        if SO_RXQ_OVFL is not None:
+            try:
+                socket_connection.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+            except OSError:
+                pass
+
+    def receive(self, socket_connection: SocketConnection, verbose: bool = False) -> List[DiscoveryData]:
+        """
+        Reads discovery responses until none arrive for discovery_timeout seconds. Every wakeup drains all pending
+        datagrams into a preallocated buffer before waiting again.
+
+        *Args:
+            socket_connection (SocketConnection): Non-blocking UDP socket, see configure_socket()
+
+        *Returns:
+            list[DiscoveryData] : A list of any discovered devices data
+        """
+        view: memoryview = memoryview(self.__buffer)
+        counts_drops: bool = SO_RXQ_OVFL is not None and hasattr(socket_connection, 'recvmsg_into')
+
+        while True:
+            readable, _writable, _errors = select.select([socket_connection], [], [], self.discovery_timeout)
+            if not readable:
+                break
+
             while True:
-                raw_data: tuple = socket_connection.recvfrom(65507)
-                data: bytes = raw_data[0]
+                try:
+                    if counts_drops:
+                        size, ancillary, _flags, _address = socket_connection.recvmsg_into([view], DROP_COUNT_SIZE)
+                        self.__update_dropped(ancillary)
+                    else:
+                        size, _address = socket_connection.recvfrom_into(view)
+                except (BlockingIOError, InterruptedError):
+                    break
+
+                # parsed straight from the buffer, handle_datagram() is done with it before the next read
+                self.handle_datagram(view[:size], verbose)
+
+        return self.discovered_devices
+
+    def __update_dropped(self, ancillary: list) -> None:
+        for level, kind, data in ancillary:
+            if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL and len(data) >= 4:
+                # cumulative count of datagrams dropped on this socket
+                self.dropped_datagrams = max(self.dropped_datagrams, struct.unpack('I', data[:4])[0])
+
+    def handle_datagram(self, data: Union[bytes, memoryview], verbose: bool = False) -> Union[DiscoveryData, None]:
+        """
+        Parses a received discovery datagram and adds it to discovered_devices. Datagrams are recorded when a trace
+        recorder is active, malformed ones are recorded too and counted so replays see the same counters. Views into
+        the receive buffer are only copied for the recorder.
+
+        *Args:
+            data (bytes | memoryview): raw bytes data from connection
+
+        *Returns:
+            (DiscoveryData | None): Parsed device data, None for a malformed datagram
+        """
+        with span('discovery.receive', bytes=len(data)) as current:
+            self.received_datagrams += 1
+            recorder: Union[TraceRecorder, None] = get_recorder()
+            if recorder is not None:
+                recorder.record_datagram(bytes(data))
+
+            try:
                 device_data: DiscoveryData = self.parse_data(data=data)
-                if verbose:
-                    print(f'Found Device {device_data["LOCATION"]}')
+            except (ValueError, UnicodeDecodeError):
+                self.malformed_datagrams += 1
+                if current is not None:
+                    current.tags['malformed'] = True
+                return None
 
-                self.discovered_devices.append(device_data)
-        except socket.timeout:
-            pass
+            if current is not None:
+                current.tags['usn'] = device_data.get('USN', None)
+            if verbose:
+                print(f'Found Device {device_data.get("LOCATION", None)}')
 
-        socket_connection.close()
+            self.discovered_devices.append(device_data)
 
-        return self.discovered_devices
+            return device_data
 
-    def parse_data(self, data: bytes) -> Dict[str, str]:
+    def parse_data(self, data: Union[str, bytes, memoryview]) -> Dict[str, str]:
         """
         Parses raw byte data from socket connection headers into a dictionary. Does not add connection status code,
         line 1 data example.
 
         *Args:
-            data (bytes): raw bytes data from connection
+            data (str | bytes | memoryview): raw bytes data from connection or the already decoded text
 
         *Returns:
             dict (str, str)
@@ -93,7 +201,7 @@ class Scanner:
                 'WAKEUP': 'MAC=e6-48-b0-c7-42-5c;Timeout=10'
             }
         """
-        decoded_data: str = data.decode('utf8')
+        decoded_data: str = data if isinstance(data, str) else str(data, 'utf8')
         header_list: list = decoded_data.split('\n')
         formatted_headers = [self.header_str_to_header_dict(header_str=header_str) for header_str in header_list[1:-2]]
 
@@ -0,0 +1,286 @@
+# coding=utf-8
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Tuple, Union
+
+from .custom_types import Response
+
+PRIORITY_HIGH: int = 0
+PRIORITY_NORMAL: int = 1
+PRIORITY_LOW: int = 2
+RETRY_STATUS_CODES: Tuple[int, ...] = (429, 503)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Callers reserve a token and wait for the returned delay, so bursts queue up behind each
+    other instead of polling.
+
+    *Attributes:
+        rate (float): Tokens added per second.
+        burst (float): Bucket capacity.
+    """
+    def __init__(self, rate: float, burst: Union[float, None] = None):
+        if rate <= 0:
+            raise ValueError('TokenBucket rate must be positive.')
+
+        self.rate: float = rate
+        self.burst: float = burst if burst is not None else max(1.0, rate)
+        self.__tokens: float = self.burst
+        self.__updated: float = time.monotonic()
+        self.__lock: threading.Lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Takes a token.
+
+        *Returns:
+            (float): Seconds to wait before the token may be used.
+        """
+        with self.__lock:
+            now: float = time.monotonic()
+            self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+            self.__updated = now
+            self.__tokens -= 1
+
+            return 0.0 if self.__tokens >= 0 else -self.__tokens / self.rate
+
+    def take(self) -> float:
+        """
+        Takes a token if one is available.
+
+        *Returns:
+            (float): 0 when a token was taken, otherwise seconds until one is available. Nothing is taken then.
+        """
+        with self.__lock:
+            now: float = time.monotonic()
+            self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+            self.__updated = now
+            if self.__tokens >= 1:
+                self.__tokens -= 1
+                return 0.0
+
+            return (1 - self.__tokens) / self.rate
+
+
+class RequestScheduler:
+    """
+    Schedules ECP requests with global and per-device concurrency caps, an optional requests-per-second limit and
+    priority classes. Waiting requests are started in priority order, then in arrival order. Safe to share between
+    event loops.
+
+    *Attributes:
+        max_concurrency (int): Requests in flight across all devices.
+        per_device_concurrency (int): Requests in flight per device, the default fits all default endpoints of a
+            device in one round trip.
+        bucket (TokenBucket | None): Requests-per-second limit, unlimited when None.
+        max_retries (int): Retries for 429 and 503 responses.
+        retry_backoff (float): First retry delay in seconds, doubled on every retry.
+        retries (int): Number of retried requests.
+        executor (ThreadPoolExecutor): Threads blocking requests run on, one per concurrency slot so a request that
+            holds a slot never waits for a thread.
+
+    *methods
+        slot(device: str, priority: int)
+
+        request(device: str, priority: int, send: Callable[[], Awaitable[Response]]) -> Response
+    """
+    def __init__(self, max_concurrency: int = 64, per_device_concurrency: int = 4,
+                 requests_per_second: Union[float, None] = None, burst: Union[float, None] = None,
+                 max_retries: int = 2, retry_backoff: float = 0.5):
+        self.max_concurrency: int = max_concurrency
+        self.per_device_concurrency: int = per_device_concurrency
+        self.bucket: Union[TokenBucket, None] = (
+            TokenBucket(requests_per_second, burst) if requests_per_second is not None else None
+        )
+        self.max_retries: int = max_retries
+        self.retry_backoff: float = retry_backoff
+        self.retries: int = 0
+        self.__executor: Union[ThreadPoolExecutor, None] = None
+        self.__active: int = 0
+        self.__device_active: Dict[str, int] = {}
+        self.__waiting: Dict[str, List[Tuple[int, int, asyncio.Future]]] = {}
+        self.__ready: List[Tuple[int, int, str]] = []
+        self.__sequence: itertools.count = itertools.count()
+        self.__dispatch_pending: bool = False
+        self.__lock: threading.Lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    thread_name_prefix='roku-scanner-ecp'
+                )
+
+            return self.__executor
+
+    @asynccontextmanager
+    async def slot(self, device: str, priority: int = PRIORITY_NORMAL) -> AsyncIterator[None]:
+        """
+        Holds a concurrency slot and a rate limit token for a device while the block runs. Both are handed out in
+        priority order, a request waiting for either holds neither.
+
+        *Args:
+            device (str): Device key, e.g. its location.
+            priority (int): PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW.
+        """
+        await self.__acquire(device, priority)
+        try:
+            yield
+        finally:
+            self.__release(device)
+
+    async def request(self, device: str, priority: int, send: Callable[[], Awaitable[Response]]) -> Response:
+        """
+        Sends a request in a slot, retrying with backoff when the device answers 429 or 503. The slot is released
+        while waiting to retry.
+
+        *Args:
+            device (str): Device key, e.g. its location.
+            priority (int): PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW.
+            send (Callable): Creates the request awaitable, called once per attempt.
+
+        *Returns:
+            (Response): Last response.
+        """
+        attempt: int = 0
+        while True:
+            async with self.slot(device, priority):
+                resp: Response = await send()
+
+            if resp.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                return resp
+
+            self.retries += 1
+            await asyncio.sleep(_retry_after(resp, self.retry_backoff * 2 ** attempt))
+            attempt += 1
+
+    async def __acquire(self, device: str, priority: int) -> None:
+        with self.__lock:
+            if (not self.__ready and not self.__waiting.get(device) and self.__has_capacity(device) and
+                    (self.bucket is None or self.bucket.take() == 0)):
+                self.__start(device)
+                return
+
+            future: asyncio.Future = asyncio.get_running_loop().create_future()
+            sequence: int = next(self.__sequence)
+            heapq.heappush(self.__waiting.setdefault(device, []), (priority, sequence, future))
+            if self.__device_active.get(device, 0) < self.per_device_concurrency:
+                heapq.heappush(self.__ready, (priority, sequence, device))
+            self.__dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.__release(device)
+            raise
+
+    def __release(self, device: str) -> None:
+        with self.__lock:
+            self.__active -= 1
+            self.__device_active[device] -= 1
+            if not self.__device_active[device]:
+                del self.__device_active[device]
+
+            self.__push_head(device)
+            self.__dispatch()
+
+    def __has_capacity(self, device: str) -> bool:
+        return (
+            self.__active < self.max_concurrency and
+            self.__device_active.get(device, 0) < self.per_device_concurrency
+        )
+
+    def __start(self, device: str) -> None:
+        self.__active += 1
+        self.__device_active[device] = self.__device_active.get(device, 0) + 1
+
+    def __push_head(self, device: str) -> None:
+        waiting: List[Tuple[int, int, asyncio.Future]] = self.__waiting.get(device, [])
+        if waiting and self.__device_active.get(device, 0) < self.per_device_concurrency:
+            heapq.heappush(self.__ready, (waiting[0][0], waiting[0][1], device))
+
+    def __dispatch(self) -> None:
+        """
+        Starts waiting requests while there is global capacity. The ready heap holds the head of every device queue
+        that has device capacity, stale entries are skipped. With a rate limit the best waiting request also needs a
+        token, when none is available dispatching stops until one is, so tokens go out in priority order too.
+        """
+        while self.__ready and self.__active < self.max_concurrency:
+            _priority, sequence, device = self.__ready[0]
+            waiting: List[Tuple[int, int, asyncio.Future]] = self.__waiting.get(device, [])
+
+            if not waiting or waiting[0][1] != sequence or not self.__has_capacity(device):
+                heapq.heappop(self.__ready)
+                continue
+
+            future: asyncio.Future = waiting[0][2]
+            if not future.cancelled() and self.bucket is not None:
+                delay: float = self.bucket.take()
+                if delay > 0:
+                    self.__dispatch_later(future.get_loop(), delay)
+                    return
+
+            heapq.heappop(self.__ready)
+            heapq.heappop(waiting)
+            if not waiting:
+                del self.__waiting[device]
+
+            if not future.cancelled():
+                self.__start(device)
+                future.get_loop().call_soon_threadsafe(self.__grant, future, device)
+
+            self.__push_head(device)
+
+    def __dispatch_later(self, loop: asyncio.AbstractEventLoop, delay: float) -> None:
+        if self.__dispatch_pending:
+            return
+
+        self.__dispatch_pending = True
+        loop.call_soon_threadsafe(loop.call_later, delay, self.__dispatch_on_token)
+
+    def __dispatch_on_token(self) -> None:
+        with self.__lock:
+            self.__dispatch_pending = False
+            self.__dispatch()
+
+    def __grant(self, future: asyncio.Future, device: str) -> None:
+        if future.cancelled():
+            self.__release(device)
+        else:
+            future.set_result(None)
+
+
+def _retry_after(resp: Response, default: float) -> float:
+    retry_after: Union[str, None] = resp.headers.get('Retry-After', None) if resp.headers is not None else None
+    try:
+        return float(retry_after) if retry_after is not None else default
+    except ValueError:
+        return default
+
+
+_scheduler: RequestScheduler = RequestScheduler()
+
+
+def get_scheduler() -> RequestScheduler:
+    """
+    Gets the scheduler every ECP request goes through.
+    """
+    return _scheduler
+
+
+def set_scheduler(scheduler: RequestScheduler) -> None:
+    """
+    Replaces the scheduler every ECP request goes through.
+    """
+    global _scheduler
+    _scheduler = scheduler
@@ -0,0 +1,226 @@
+# coding=utf-8
+import contextvars
+import cProfile
+import itertools
+import json
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Union
+
+from .custom_types import PathType
+
+TRACE_FORMATS = ('jsonl', 'chrome')
+
+
+class Span:
+    """
+    Timed phase of work. Spans opened inside another span become its children and inherit its tags.
+
+    *Attributes:
+        id (int): Span id, unique per tracer.
+        parent_id (int | None): Id of the enclosing span.
+        name (str): Phase name, e.g. ecp.request.
+        tags (dict): Device USN, endpoint and other details. Can be extended while the span is open.
+        start (float): Seconds since the tracer was created.
+        duration (float | None): Seconds the span was open, None while it is open.
+        thread_id (int): Thread the span was opened on.
+    """
+    __slots__ = ('id', 'parent_id', 'name', 'tags', 'start', 'duration', 'thread_id')
+
+    def __init__(self, span_id: int, parent: Union['Span', None], name: str, tags: Dict[str, Any], start: float):
+        self.id: int = span_id
+        self.parent_id: Union[int, None] = parent.id if parent is not None else None
+        self.name: str = name
+        self.tags: Dict[str, Any] = dict(parent.tags, **tags) if parent is not None else tags
+        self.start: float = start
+        self.duration: Union[float, None] = None
+        self.thread_id: int = threading.get_ident()
+
+    def as_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': round(self.start, 6),
+            'duration': round(self.duration, 6) if self.duration is not None else None,
+            'thread_id': self.thread_id,
+            'tags': self.tags
+        }
+
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('roku_scanner_span', default=None)
+
+
+class Tracer:
+    """
+    Collects spans from every thread and task and exports them as JSON lines or Chrome trace events.
+
+    *Attributes:
+        spans (list[Span]): Finished spans.
+
+    *methods
+        span(name: str, **tags)
+
+        export(path: str | PathType, format: str)
+    """
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.__origin: float = time.perf_counter()
+        self.__ids: itertools.count = itertools.count(1)
+        self.__lock: threading.Lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **tags: Any) -> Iterator[Span]:
+        """
+        Opens a span for the duration of the block, nested under the current span of this thread or task.
+        """
+        parent: Union[Span, None] = _current_span.get()
+        current: Span = Span(next(self.__ids), parent, name, tags, time.perf_counter() - self.__origin)
+        token: contextvars.Token = _current_span.set(current)
+        try:
+            yield current
+        finally:
+            current.duration = time.perf_counter() - self.__origin - current.start
+            _current_span.reset(token)
+            with self.__lock:
+                self.spans.append(current)
+
+    def export(self, path: Union[str, PathType], format: str = 'jsonl') -> None:
+        """
+        Writes finished spans to a file.
+
+        *Args:
+            path (str | PathType): Output file.
+            format (str): jsonl, one span per line, or chrome, loadable in chrome://tracing and Perfetto.
+        """
+        with self.__lock:
+            spans: List[Span] = sorted(self.spans, key=lambda s: s.start)
+
+        with open(path, 'w') as f:
+            if format == 'jsonl':
+                for finished in spans:
+                    f.write(json.dumps(finished.as_dict(), separators=(',', ':'), default=str) + '\n')
+            elif format == 'chrome':
+                json.dump({'traceEvents': [_chrome_event(finished) for finished in spans]}, f, default=str)
+            else:
+                raise ValueError(f'Unknown trace format "{format}", expected one of {", ".join(TRACE_FORMATS)}.')
+
+
+def _chrome_event(finished: Span) -> dict:
+    # concurrent device requests overlap on one thread, so each device gets its own lane to keep events nested
+    lane: Any = finished.tags.get('device', None) or finished.thread_id
+
+    return {
+        'name': finished.name,
+        'cat': finished.name.split('.', 1)[0],
+        'ph': 'X',
+        'ts': round(finished.start * 1e6, 3),
+        'dur': round((finished.duration or 0) * 1e6, 3),
+        'pid': 1,
+        'tid': str(lane),
+        'args': finished.tags
+    }
+
+
+class Profiler:
+    """
+    Wraps phases in cProfile and writes one profile per phase. Repeated phases accumulate into the same profile.
+    cProfile only sees the thread a phase runs on, so async phases are profiled on the event loop thread.
+
+    *Attributes:
+        directory (PathType): Directory profiles are written to as {phase}.prof.
+        profiles (dict[str, cProfile.Profile]): Profile per phase.
+    """
+    def __init__(self, directory: Union[str, PathType]):
+        self.directory: PathType = PathType(directory)
+        self.profiles: Dict[str, cProfile.Profile] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Profiles the block under a phase name.
+        """
+        profile: cProfile.Profile = self.profiles.setdefault(name, cProfile.Profile())
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+
+    def dump(self) -> List[PathType]:
+        """
+        Writes every phase profile, readable with pstats or snakeviz.
+
+        *Returns:
+            (list[PathType]): Written files.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        written: List[PathType] = []
+        for name, profile in self.profiles.items():
+            path: PathType = self.directory / f'{name}.prof'
+            profile.dump_stats(str(path))
+            written.append(path)
+
+        return written
+
+
+_tracer: Union[Tracer, None] = None
+_profiler: Union[Profiler, None] = None
+
+
+def get_tracer() -> Union[Tracer, None]:
+    """
+    Gets the active tracer, None when tracing is off.
+    """
+    return _tracer
+
+
+def set_tracer(tracer: Union[Tracer, None]) -> None:
+    """
+    Turns tracing on with tracer, None turns it off.
+    """
+    global _tracer
+    _tracer = tracer
+
+
+def get_profiler() -> Union[Profiler, None]:
+    """
+    Gets the active profiler, None when profiling is off.
+    """
+    return _profiler
+
+
+def set_profiler(profiler: Union[Profiler, None]) -> None:
+    """
+    Turns profiling on with profiler, None turns it off.
+    """
+    global _profiler
+    _profiler = profiler
+
+
+@contextmanager
+def span(name: str, **tags: Any) -> Iterator[Union[Span, None]]:
+    """
+    Opens a span on the active tracer, does nothing when tracing is off.
+    """
+    if _tracer is None:
+        yield None
+        return
+
+    with _tracer.span(name, **tags) as current:
+        yield current
+
+
+@contextmanager
+def profile_phase(name: str) -> Iterator[None]:
+    """
+    Profiles the block on the active profiler, does nothing when profiling is off.
+    """
+    if _profiler is None:
+        yield
+        return
+
+    with _profiler.phase(name):
+        yield
@@ -0,0 +1,194 @@
+# coding=utf-8
+import asyncio
+import socket
+import time
+import requests
+
+from typing import Dict, Iterable, List, Tuple, Union
+from xml.parsers.expat import ExpatError
+
+from .custom_types import EcpData, SocketConnection, WakeResult
+from .loop import get_background_loop
+from .roku import Roku, fetch_device_info
+
+DEFAULT_WAKE_TIMEOUT: float = 10.0
+POWER_ON: str = 'PowerOn'
+
+
+def parse_wakeup(wakeup: str) -> Tuple[str, float]:
+    """
+    Parses the SSDP WAKEUP header.
+
+    *Args:
+        wakeup (str): WAKEUP header value.
+
+    *Returns:
+        (str, float): MAC address and advertised wake timeout in seconds.
+
+    *Example:
+        input: 'MAC=e6-48-b0-c7-42-5c;Timeout=10'
+        output: ('e6-48-b0-c7-42-5c', 10.0)
+    """
+    fields: dict = {}
+    for field in wakeup.split(';'):
+        if '=' in field:
+            key, value = field.split('=', 1)
+            fields[key.strip().lower()] = value.strip()
+
+    mac: Union[str, None] = fields.get('mac', None)
+    if not mac:
+        raise ValueError(f'No MAC in WAKEUP header "{wakeup}".')
+
+    try:
+        timeout: float = float(fields.get('timeout', DEFAULT_WAKE_TIMEOUT))
+    except ValueError:
+        timeout = DEFAULT_WAKE_TIMEOUT
+
+    return mac, timeout
+
+
+def magic_packet(mac: str) -> bytes:
+    """
+    Builds a Wake-on-LAN magic packet, 6 bytes of 0xFF followed by the MAC repeated 16 times.
+
+    *Args:
+        mac (str): MAC address, separated by -, : or nothing.
+    """
+    mac_hex: str = mac.replace('-', '').replace(':', '').replace('.', '')
+    mac_bytes: bytes = bytes.fromhex(mac_hex)
+    if len(mac_bytes) != 6:
+        raise ValueError(f'Invalid MAC address "{mac}".')
+
+    return b'\xff' * 6 + mac_bytes * 16
+
+
+def send_magic_packets(macs: Iterable[str], broadcast: str = '255.255.255.255', port: int = 9) -> int:
+    """
+    Sends Wake-on-LAN magic packets for every MAC from a single broadcast socket.
+
+    *Args:
+        macs (Iterable[str]): MAC addresses to wake.
+        broadcast (str): Broadcast address packets are sent to.
+        port (int): UDP port, 9 (discard) by convention.
+
+    *Returns:
+        (int): Number of packets sent.
+    """
+    packets: List[bytes] = [magic_packet(mac) for mac in macs]
+
+    socket_connection: SocketConnection = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    try:
+        socket_connection.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        for packet in packets:
+            socket_connection.sendto(packet, (broadcast, port))
+    finally:
+        socket_connection.close()
+
+    return len(packets)
+
+
+async def wait_until_ready(roku: Roku, timeout: float, initial_delay: float = 0.25,
+                           max_delay: float = 2.0) -> Union[float, None]:
+    """
+    Polls device info with exponential backoff until the device reports PowerOn.
+
+    *Args:
+        roku (Roku): Device being woken.
+        timeout (float): Seconds to wait before giving up.
+        initial_delay (float): First delay between polls.
+        max_delay (float): Upper bound for the delay between polls.
+
+    *Returns:
+        (float | None): Seconds until the device was ready or None if it timed out.
+    """
+    start: float = time.monotonic()
+    deadline: float = start + timeout
+    delay: float = initial_delay
+
+    while True:
+        try:
+            # bound every poll by the remaining time, a single request may otherwise run for ECP_TIMEOUT
+            device_info: Union[EcpData, Dict[str, str]] = await asyncio.wait_for(
+                fetch_device_info(roku.location),
+                max(deadline - time.monotonic(), 0)
+            )
+        except (asyncio.TimeoutError, requests.exceptions.RequestException, ExpatError):
+            # devices refuse connections, time out or send partial bodies while booting
+            device_info = {}
+
+        data: Union[dict, str, None] = device_info.get('data', None)
+        info: Union[dict, None] = data.get('device-info', None) if isinstance(data, dict) else None
+        if isinstance(info, dict):
+            power_mode: Union[str, None] = info.get('power-mode', None)
+            roku.power_mode = power_mode
+            if power_mode == POWER_ON:
+                return time.monotonic() - start
+
+        remaining: float = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
+async def apower_on(rokus: Iterable[Roku], broadcast: str = '255.255.255.255', port: int = 9,
+                    timeout: Union[float, None] = None) -> List[WakeResult]:
+    """
+    Wakes devices with one batch of Wake-on-LAN packets and concurrently waits until each reports PowerOn.
+
+    *Args:
+        rokus (Iterable[Roku]): Devices to wake, the MAC and timeout come from their WAKEUP discovery header.
+        broadcast (str): Broadcast address packets are sent to.
+        port (int): UDP port packets are sent to.
+        timeout (float | None): Overrides the advertised wake timeout.
+
+    *Returns:
+        (list[WakeResult]): Result per device in the order given.
+    """
+    results: List[WakeResult] = []
+    targets: List[Tuple[Roku, WakeResult, float]] = []
+    macs: List[str] = []
+
+    for roku in rokus:
+        result: WakeResult = {
+            'location': roku.location,
+            'mac': None,
+            'ready': False,
+            'time_to_ready': None,
+            'error': None
+        }
+        results.append(result)
+
+        try:
+            mac, advertised_timeout = parse_wakeup(roku.discovery_data.get('WAKEUP', ''))
+            magic_packet(mac)
+        except ValueError as e:
+            result['error'] = str(e)
+            continue
+
+        result['mac'] = mac
+        macs.append(mac)
+        targets.append((roku, result, timeout if timeout is not None else advertised_timeout))
+
+    send_magic_packets(macs, broadcast, port)
+
+    ready_times: List[Union[float, None]] = await asyncio.gather(*[
+        wait_until_ready(roku, target_timeout) for roku, _result, target_timeout in targets
+    ])
+
+    for (_roku, result, target_timeout), ready_time in zip(targets, ready_times):
+        result['ready'] = ready_time is not None
+        result['time_to_ready'] = ready_time
+        if ready_time is None:
+            result['error'] = f'Not ready after {target_timeout}s'
+
+    return results
+
+
+def power_on(rokus: Iterable[Roku], broadcast: str = '255.255.255.255', port: int = 9,
+             timeout: Union[float, None] = None) -> List[WakeResult]:
+    """
+    Sync version of apower_on(), runs on the shared background loop.
+    """
+    return get_background_loop().run(apower_on(rokus, broadcast, port, timeout))
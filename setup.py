@@ -32,6 +32,11 @@ setup(
         "tqdm",
         "xmltodict"
     ],
+    extras_require={
+        "msgpack": ["msgpack"],
+        "cbor": ["cbor2"],
+        "zstd": ["zstandard"]
+    },
     entry_points={
         "console_scripts": [
             "roku_scanner=roku_scanner.__main__:main",
@@ -0,0 +1,12 @@
+from typing import Union
+
+
+class MockResponse:
+    """
+    Stand-in for requests.Response, text and content are derived from the same body.
+    """
+    def __init__(self, body: Union[str, bytes] = b'', status_code: int = 200, headers: Union[dict, None] = None):
+        self.content: bytes = body.encode('utf8') if isinstance(body, str) else body
+        self.text: str = self.content.decode('utf8', errors='replace')
+        self.status_code: int = status_code
+        self.headers: dict = headers if headers is not None else {}
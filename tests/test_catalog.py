@@ -0,0 +1,80 @@
+from typing import List
+
+from roku_scanner.catalog import AppCatalog, memory_report
+from roku_scanner.custom_types import RokuApp
+from roku_scanner.roku import Roku
+
+
+def make_app(app_id: str, version: str, name: str, active: bool = False) -> RokuApp:
+    return {
+        'id': app_id,
+        'type': 'appl',
+        'subtype': None,
+        'version': version,
+        'name': name,
+        'active': active
+    }
+
+
+def make_roku(location: str, apps: List[RokuApp]) -> Roku:
+    roku: Roku = Roku(location=location, discovery_data={})
+    roku.apps = apps
+    return roku
+
+
+def test_catalog_interns_records_across_devices():
+    first: Roku = make_roku('http://127.0.0.1:8060/', [make_app('12', '5.0', 'Netflix')])
+    second: Roku = make_roku('http://127.0.0.2:8060/', [make_app('12', '5.0', 'Netflix', active=True)])
+    catalog: AppCatalog = AppCatalog([first, second])
+
+    assert len(catalog.records) == 1
+    assert next(iter(catalog.apps_on(first))) is next(iter(catalog.apps_on(second)))
+    assert catalog.active_by_device == {second: catalog.records[('12', '5.0')]}
+
+
+def test_catalog_inverted_lookups():
+    first: Roku = make_roku('http://127.0.0.1:8060/', [make_app('12', '5.0', 'Netflix')])
+    second: Roku = make_roku('http://127.0.0.2:8060/', [make_app('12', '5.1', 'Netflix')])
+    catalog: AppCatalog = AppCatalog([first, second])
+
+    assert catalog.devices_with('12', '5.0') == {first}
+    assert catalog.devices_with('12') == {first, second}
+    assert catalog.devices_with('13') == set()
+    assert catalog.versions_of('12') == {'5.0': 1, '5.1': 1}
+
+
+def test_catalog_remove_device_releases_records():
+    first: Roku = make_roku('http://127.0.0.1:8060/', [make_app('12', '5.0', 'Netflix')])
+    catalog: AppCatalog = AppCatalog([first])
+    catalog.remove_device(first)
+
+    assert catalog.records == {}
+    assert catalog.devices_by_app == {}
+    assert catalog.apps_on(first) == set()
+
+
+def test_catalog_memory_report():
+    rokus: List[Roku] = [
+        make_roku(f'http://127.0.0.{i}:8060/', [make_app(str(app_id), '1.0', f'App {app_id}') for app_id in range(40)])
+        for i in range(20)
+    ]
+    catalog: AppCatalog = AppCatalog()
+    report: dict = memory_report(rokus, catalog)
+
+    assert report['records'] == 40
+    assert report['devices'] == 20
+    assert report['after'] < report['before']
+    assert rokus[0].apps[0] is rokus[1].apps[0]
+    assert rokus[0].apps[0] == make_app('0', '1.0', 'App 0')
+
+
+def test_catalog_shares_apps_per_active_state():
+    first: Roku = make_roku('http://127.0.0.1:8060/', [make_app('12', '5.0', 'Netflix')])
+    second: Roku = make_roku('http://127.0.0.2:8060/', [make_app('12', '5.0', 'Netflix', active=True)])
+    catalog: AppCatalog = AppCatalog([first, second])
+
+    assert first.apps[0]['active'] is False
+    assert second.apps[0]['active'] is True
+    catalog.remove_device(first)
+    catalog.remove_device(second)
+    assert catalog.shared_apps == {}
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from typing import List
+
+import pytest
+
+from roku_scanner import endpoints
+from roku_scanner.endpoints import get_default_endpoints, register_endpoint, set_default_endpoints
+from roku_scanner.roku import fetch_all_data, fetch_endpoint
+from roku_scanner.scheduler import RequestScheduler, set_scheduler
+from tests.conftest import MockResponse
+
+LOCATION = 'http://127.0.0.1:8060/'
+RESPONSE_TIME = 0.1
+
+
+@pytest.fixture
+def requested(monkeypatch) -> List[str]:
+    paths: List[str] = []
+
+    def mock_get(url: str, **kwargs) -> MockResponse:
+        paths.append(url[len(LOCATION):])
+        time.sleep(RESPONSE_TIME)
+        name: str = url.split('/')[-1]
+        return MockResponse(f'<{name}>{len(paths)}</{name}>')
+
+    monkeypatch.setattr('roku_scanner.roku._session.get', mock_get)
+    monkeypatch.setattr(endpoints, 'ENDPOINTS', dict(endpoints.ENDPOINTS))
+    yield paths
+    set_scheduler(RequestScheduler())
+
+
+def test_fetch_all_data_fetches_default_endpoints_in_one_round_trip(requested: List[str]):
+    start: float = time.monotonic()
+    data: dict = asyncio.run(fetch_all_data(LOCATION))
+    elapsed: float = time.monotonic() - start
+
+    # the default per-device cap fits every default endpoint, a device costs no more than its slowest endpoint
+    assert RESPONSE_TIME <= elapsed < RESPONSE_TIME * 2
+    assert list(data) == [endpoint.key for endpoint in get_default_endpoints()]
+    assert len(requested) == len(data)
+
+
+def test_fetch_all_data_requests_extra_endpoints_in_one_round_trip(requested: List[str]):
+    keys: List[str] = ['device_info', 'apps', 'active_app', 'media_player', 'tv_channels', 'tv_active_channel',
+                       'chanperf']
+    set_scheduler(RequestScheduler(per_device_concurrency=len(keys)))
+    start: float = time.monotonic()
+    data: dict = asyncio.run(fetch_all_data(LOCATION, endpoints=keys))
+    elapsed: float = time.monotonic() - start
+
+    assert RESPONSE_TIME <= elapsed < RESPONSE_TIME * 2
+    assert list(data) == keys
+    assert sorted(requested) == sorted(f'query/{key.replace("_", "-")}' for key in keys)
+    assert data['chanperf']['data']['chanperf'] is not None
+
+
+def test_fetch_endpoint_reuses_result_within_ttl(requested: List[str]):
+    first: dict = asyncio.run(fetch_endpoint(LOCATION, 'device_info'))
+    refreshed: dict = asyncio.run(fetch_endpoint(LOCATION, 'device_info', first))
+
+    register_endpoint('device_info', 'query/device-info', ttl=60)
+    cached: dict = asyncio.run(fetch_endpoint(LOCATION, 'device_info', refreshed))
+
+    assert refreshed is not first
+    assert cached is refreshed
+    assert requested == ['query/device-info', 'query/device-info']
+
+
+def test_registered_endpoint_parser_and_defaults(requested: List[str]):
+    def parse_uptime(resp, previous) -> dict:
+        return {'data': {'uptime': int(resp.text.split('>')[1].split('<')[0])}, 'xml': resp.text, 'hash': ''}
+
+    register_endpoint('uptime', 'query/uptime', parser=parse_uptime, default=False)
+    set_default_endpoints(['media_player', 'uptime'])
+
+    assert [endpoint.key for endpoint in get_default_endpoints()] == ['media_player', 'uptime']
+    data: dict = asyncio.run(fetch_all_data(LOCATION))
+    assert isinstance(data['uptime']['data']['uptime'], int)
+
+    with pytest.raises(ValueError):
+        set_default_endpoints(['unknown'])
@@ -0,0 +1,137 @@
+from pathlib import Path
+from typing import List
+
+import pytest
+import requests
+
+from roku_scanner.custom_types import DiscoveryData
+from roku_scanner.fleet import Condition, Fleet, parse_where
+from roku_scanner.roku import Roku
+from tests.conftest import MockResponse
+
+MOCK_DATA = Path(__file__).parent / 'mock_data'
+
+
+def make_discovery_data(i: int, firmware: str = '9.2.0') -> DiscoveryData:
+    return {
+        'USN': f'uuid:roku:ecp:YN00XF787685{i}',
+        'Server': f'Roku/{firmware} UPnP/1.0 Roku/{firmware}',
+        'LOCATION': f'http://127.0.0.{i}:8060/',
+        'WAKEUP': 'MAC=e6-48-b0-c7-42-5c;Timeout=10'
+    }
+
+
+def make_roku(i: int, model_number: str, power_mode: str) -> Roku:
+    discovery_data: DiscoveryData = make_discovery_data(i)
+    roku: Roku = Roku(location=discovery_data['LOCATION'], discovery_data=discovery_data)
+    roku.model_number = model_number
+    roku.power_mode = power_mode
+    roku.serial_number = f'YN00XF787685{i}'
+    return roku
+
+
+def test_parse_where():
+    conditions: List[Condition] = parse_where('server~9.2 and model-number="3930X" AND power_mode!=PowerOn')
+
+    assert conditions == [
+        Condition('Server', '~', '9.2', True),
+        Condition('model_number', '=', '3930x', False),
+        Condition('power_mode', '!=', 'poweron', False)
+    ]
+    assert parse_where(None) == []
+
+
+def test_parse_where_keeps_and_inside_quotes():
+    conditions: List[Condition] = parse_where('user_device_name="Den and Kitchen" and server~\'9.2 AND up\'')
+
+    assert conditions == [
+        Condition('user_device_name', '=', 'den and kitchen', False),
+        Condition('Server', '~', '9.2 and up', True)
+    ]
+
+
+def test_parse_where_invalid_clause():
+    with pytest.raises(ValueError):
+        parse_where('model_number')
+
+
+def test_parse_where_unknown_field():
+    with pytest.raises(ValueError, match='modle_number'):
+        parse_where('modle_number=3930X')
+    with pytest.raises(ValueError):
+        Fleet().get('modle_number', '3930X')
+    with pytest.raises(ValueError, match='apps'):
+        parse_where('apps~netflix')
+
+
+def test_fleet_where_uses_indexes_and_scans():
+    rokus: List[Roku] = [
+        make_roku(1, '3930X', 'PowerOn'),
+        make_roku(2, '3930X', 'DisplayOff'),
+        make_roku(3, '4670X', 'PowerOn')
+    ]
+    fleet: Fleet = Fleet(rokus)
+
+    assert fleet.where('model_number=3930x').rokus == rokus[:2]
+    assert fleet.where('model_number=3930X and power_mode=PowerOn').rokus == rokus[:1]
+    assert fleet.where('power_mode!=PowerOn').rokus == rokus[1:2]
+    assert fleet.where('model_number=9999X').rokus == []
+    assert fleet.get('serial_number', 'YN00XF7876853') == rokus[2:]
+
+    added: Roku = make_roku(4, '3930X', 'PowerOn')
+    fleet.add(added)
+    assert fleet.where('model_number=3930X and power_mode=PowerOn').rokus == [rokus[0], added]
+
+
+def test_fleet_reindex_after_attribute_change():
+    roku: Roku = make_roku(1, '3930X', 'DisplayOff')
+    fleet: Fleet = Fleet([roku])
+    assert fleet.get('power_mode', 'PowerOn') == []
+
+    roku.power_mode = 'PowerOn'
+    fleet.reindex()
+    assert fleet.get('power_mode', 'PowerOn') == [roku]
+
+
+def test_fleet_from_discovery_applies_only_discovery_filters():
+    discovered: List[DiscoveryData] = [
+        make_discovery_data(1, '9.2.0'),
+        make_discovery_data(2, '10.0.0'),
+        {'Server': 'Linux UPnP/1.0', 'LOCATION': 'http://127.0.0.9:80/'}
+    ]
+    fleet: Fleet = Fleet.from_discovery(discovered, 'Server~roku/9.2 and model_number=3930X')
+
+    assert [roku.location for roku in fleet] == ['http://127.0.0.1:8060/']
+
+
+def test_fleet_fetch_continues_past_failed_devices(monkeypatch):
+    async def mock_ecp_get(roku_location: str, path: str, priority: int) -> MockResponse:
+        if roku_location == 'http://127.0.0.2:8060/':
+            raise requests.exceptions.ConnectTimeout(f'{roku_location}{path}')
+        return MockResponse((MOCK_DATA / f'{path.split("/")[-1]}.xml').read_bytes())
+
+    monkeypatch.setattr('roku_scanner.roku.ecp_get', mock_ecp_get)
+    rokus: List[Roku] = [
+        Roku(location=f'http://127.0.0.{i}:8060/', discovery_data=make_discovery_data(i)) for i in range(1, 4)
+    ]
+    fleet: Fleet = Fleet(rokus)
+    fleet.fetch_data()
+
+    assert rokus[0].serial_number is not None and rokus[2].serial_number is not None
+    assert rokus[1].serial_number is None
+    assert rokus[1].data['device_info'] == {'Error': 'Unable to reach device at http://127.0.0.2:8060/'}
+    assert fleet.fetch_errors == {}
+
+
+def test_fleet_fetch_collects_device_errors(monkeypatch):
+    async def mock_afetch_data(self):
+        if self.location == 'http://127.0.0.2:8060/':
+            raise RuntimeError('device went away')
+        self.power_mode = 'PowerOn'
+
+    monkeypatch.setattr(Roku, 'afetch_data', mock_afetch_data)
+    fleet: Fleet = Fleet([Roku(location=f'http://127.0.0.{i}:8060/', discovery_data={}) for i in range(1, 4)])
+    fleet.fetch_data()
+
+    assert list(fleet.fetch_errors) == ['http://127.0.0.2:8060/']
+    assert len(fleet.where('power_mode=PowerOn')) == 2
@@ -0,0 +1,62 @@
+import io
+from pathlib import Path
+from typing import List
+
+import pytest
+import xmltodict  # type: ignore
+
+from roku_scanner.custom_types import DiscoveryData
+from roku_scanner.formats import dump, load_dump
+from roku_scanner.roku import Roku
+
+MOCK_DATA = Path(__file__).parent / 'mock_data'
+
+
+@pytest.fixture
+def rokus() -> List[Roku]:
+    data: dict = {}
+    for key in ('device_info', 'apps', 'active_app', 'media_player'):
+        with (MOCK_DATA / f'{key.replace("_", "-")}.xml').open('r') as mock_file:
+            mock_xml: str = mock_file.read()
+            data[key] = {'data': xmltodict.parse(mock_xml), 'xml': mock_xml}
+
+    devices: List[Roku] = []
+    for i in range(3):
+        discovery_data: DiscoveryData = {'LOCATION': f'http://127.0.0.{i}:8060/', 'USN': f'uuid:roku:ecp:{i}'}
+        roku: Roku = Roku(location=discovery_data['LOCATION'], discovery_data=discovery_data)
+        roku.load_data(data)
+        devices.append(roku)
+
+    return devices
+
+
+@pytest.mark.parametrize('format', ['jsonl', 'msgpack', 'cbor'])
+@pytest.mark.parametrize('compression', [None, 'gzip', 'zstd'])
+def test_dump_round_trip(rokus: List[Roku], tmp_path: Path, format: str, compression: str):
+    if format != 'jsonl':
+        pytest.importorskip('msgpack' if format == 'msgpack' else 'cbor2')
+    if compression == 'zstd':
+        pytest.importorskip('zstandard')
+
+    path: Path = tmp_path / 'dump'
+    assert dump(rokus, path, format=format, compression=compression) == 3
+
+    loaded: List[Roku] = list(load_dump(path))
+    assert [roku.location for roku in loaded] == [roku.location for roku in rokus]
+    assert loaded[0].serial_number == rokus[0].serial_number
+    assert loaded[0].apps == rokus[0].apps
+    assert loaded[0].as_json() == rokus[0].as_json()
+
+
+def test_dump_exclusions(rokus: List[Roku]):
+    stream: io.BytesIO = io.BytesIO()
+    dump(rokus, stream, format='jsonl', exclude=['apps'])
+    stream.seek(0)
+
+    loaded: List[Roku] = list(load_dump(stream))
+    assert loaded[0].apps is None
+    assert loaded[0].serial_number == rokus[0].serial_number
+
+
+def test_load_empty_dump():
+    assert list(load_dump(io.BytesIO(b''))) == []
@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pytest
+
+from roku_scanner.custom_types import RokuApp
+from roku_scanner.icons import IconCache, IconFetcher
+from roku_scanner.roku import ECP_TIMEOUT, Roku
+from tests.conftest import MockResponse
+
+
+def make_roku(location: str) -> Roku:
+    roku: Roku = Roku(location=location, discovery_data={})
+    app: RokuApp = {
+        'id': '12',
+        'type': 'appl',
+        'subtype': None,
+        'version': '5.0.81179056',
+        'name': 'Netflix',
+        'active': False
+    }
+    roku.apps = [app]
+    return roku
+
+
+def test_icon_cache_put_and_get(tmp_path: Path):
+    cache: IconCache = IconCache(tmp_path)
+    digest: str = cache.put('12', '1.0', b'icon-bytes')
+    icon = cache.get('12', '1.0')
+
+    assert icon is not None
+    assert icon['content'] == b'icon-bytes'
+    assert cache.object_path(digest).exists()
+    assert IconCache(tmp_path).get('12', '1.0') is not None
+
+
+def test_icon_cache_shares_identical_content(tmp_path: Path):
+    cache: IconCache = IconCache(tmp_path)
+    first: str = cache.put('12', '1.0', b'icon-bytes')
+    second: str = cache.put('12', '1.1', b'icon-bytes')
+
+    assert first == second
+    assert cache.size() == len(b'icon-bytes')
+
+
+def test_icon_cache_evicts_to_max_bytes(tmp_path: Path):
+    cache: IconCache = IconCache(tmp_path, max_bytes=10)
+    cache.put('1', '1', b'a' * 8)
+    cache.put('2', '1', b'b' * 8)
+
+    assert cache.size() <= 10
+    assert cache.get('1', '1') is None
+    assert cache.get('2', '1') is not None
+
+
+def test_icon_fetcher_fetches_once_per_app_version(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    requested: list = []
+
+    def mock_get(url, **kwargs):
+        assert kwargs['timeout'] == ECP_TIMEOUT
+        requested.append(url)
+        return MockResponse(b'icon-bytes', headers={'Content-Type': 'image/png'})
+
+    monkeypatch.setattr('roku_scanner.roku._session.get', mock_get)
+    fetcher: IconFetcher = IconFetcher(IconCache(tmp_path))
+    rokus = [make_roku(f'http://127.0.0.{i}:8060/') for i in range(1, 4)]
+
+    icons = fetcher.fetch_icons(rokus)
+    fetcher.fetch_icons(rokus)
+
+    assert list(icons.keys()) == [('12', '5.0.81179056')]
+    assert requested == ['http://127.0.0.1:8060/query/icon/12']
+    assert fetcher.fetched == 1
+    assert fetcher.hits == 1
+
+
+def test_icon_cache_batches_index_writes(tmp_path: Path):
+    cache: IconCache = IconCache(tmp_path, max_bytes=40)
+    for i in range(10):
+        cache.put(str(i), '1', bytes([i]) * 8, save_index=False)
+
+    assert not cache.index_path.exists()
+    assert cache.size() == 40
+    assert sorted(key.split('@')[0] for key in cache.index) == ['5', '6', '7', '8', '9']
+
+    cache.save_index()
+    reopened: IconCache = IconCache(tmp_path, max_bytes=40)
+    assert reopened.size() == 40
+    assert reopened.get('9', '1') is not None
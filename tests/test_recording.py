@@ -0,0 +1,61 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from roku_scanner.recording import TracePlayer, TraceRecorder, set_player
+from roku_scanner.roku import Roku
+from roku_scanner.scanner import Scanner
+from tests.conftest import MockResponse
+
+MOCK_DATA = Path(__file__).parent / 'mock_data'
+LOCATION = 'http://127.0.0.1:8060/'
+
+
+@pytest.fixture
+def trace_path(tmp_path: Path) -> Path:
+    path: Path = tmp_path / 'trace.gz'
+    with TraceRecorder(path) as recorder:
+        recorder.record_datagram((MOCK_DATA / 'discovery_data.txt').read_bytes())
+        recorder.record_datagram(b'HTTP/1.1 200 OK\r\nnot a header\r\n\r\n\r\n')
+        for endpoint in ('device-info', 'apps', 'active-app', 'media-player'):
+            response: MockResponse = MockResponse(
+                (MOCK_DATA / f'{endpoint}.xml').read_bytes(),
+                headers={'Content-Type': 'text/xml; charset="utf-8"'}
+            )
+            recorder.record_response(LOCATION, f'query/{endpoint}', response, 0.05)
+        recorder.record_error(LOCATION, 'query/icon/12', ConnectionError('refused'), 0.01)
+
+    return path
+
+
+@pytest.fixture
+def player(trace_path: Path):
+    trace_player: TracePlayer = TracePlayer.load(trace_path, speed=0)
+    set_player(trace_player)
+    yield trace_player
+    set_player(None)
+
+
+def test_replay_discovery(player: TracePlayer):
+    scanner: Scanner = Scanner()
+    devices: list = player.discover(scanner)
+
+    assert len(devices) == 1
+    assert devices[0]['LOCATION'] == LOCATION
+    assert scanner.received_datagrams == 2
+    assert scanner.malformed_datagrams == 1
+
+
+def test_replay_ecp_responses(player: TracePlayer):
+    roku: Roku = Roku(location=LOCATION, discovery_data={})
+    asyncio.run(roku.afetch_data())
+
+    assert roku.serial_number is not None
+    assert roku.apps is not None and len(roku.apps) != 0
+    assert roku.data['device_info']['xml'] == (MOCK_DATA / 'device-info.xml').read_text()
+
+
+def test_replay_recorded_error(player: TracePlayer):
+    with pytest.raises(Exception, match='refused'):
+        asyncio.run(player.response(LOCATION, 'query/icon/12'))
@@ -1,3 +1,4 @@
+import asyncio
 from pathlib import Path
 from typing import Dict
 
@@ -5,7 +6,9 @@ import pytest
 import xmltodict  # type: ignore
 
 from roku_scanner.custom_types import PathType
-from roku_scanner.roku import Roku
+from roku_scanner.loop import get_background_loop
+from roku_scanner.roku import Roku, parse_response
+from tests.conftest import MockResponse
 
 MOCK_DATA = Path(__file__).parent / 'mock_data'
 
@@ -76,3 +79,64 @@ def test_roku_as_json_with_exclusions(mock_device_data):
     formatted = roku.as_json(exclude=['device_info'])
     assert isinstance(formatted, str)
     assert len(formatted) != 0
+
+
+def test_roku_load_data(mock_device_data, discovery_data):
+    roku: Roku = Roku(location='http://127.0.0.1:8060/', discovery_data=discovery_data)
+    roku.load_data(mock_device_data)
+    assert roku.serial_number is not None
+    assert roku.apps is not None and len(roku.apps) != 0
+    assert roku.player is not None
+
+
+def test_roku_fetch_data_reuses_background_loop(mock_device_data, monkeypatch):
+    loops: list = []
+
+    async def mock_fetch_all_data(roku_location: str, previous: dict = None) -> dict:
+        loops.append(asyncio.get_running_loop())
+        return mock_device_data
+
+    monkeypatch.setattr('roku_scanner.roku.fetch_all_data', mock_fetch_all_data)
+    roku: Roku = Roku(location='http://127.0.0.1:8060/', discovery_data={'USN': 'uuid:roku:ecp:YN00XF7876856'})
+    roku.fetch_data()
+    roku.fetch_data()
+
+    assert loops[0] is loops[1]
+    assert loops[0] is get_background_loop().loop
+
+
+def test_roku_fetch_data_inside_running_loop(mock_device_data, monkeypatch):
+    async def mock_fetch_all_data(roku_location: str, previous: dict = None) -> dict:
+        return mock_device_data
+
+    async def poll() -> Roku:
+        roku: Roku = Roku(location='http://127.0.0.1:8060/', discovery_data={'USN': 'uuid:roku:ecp:YN00XF7876856'})
+        roku.fetch_data()
+        await roku.afetch_data()
+        return roku
+
+    monkeypatch.setattr('roku_scanner.roku.fetch_all_data', mock_fetch_all_data)
+    assert asyncio.run(poll()).serial_number is not None
+
+
+def test_parse_response_reuses_unchanged_body(mock_device_data):
+    xml: str = mock_device_data['device_info']['xml']
+    first = parse_response(MockResponse(xml))
+    unchanged = parse_response(MockResponse(xml), first)
+    changed = parse_response(MockResponse(xml.replace('PowerOn', 'DisplayOff')), first)
+
+    assert unchanged is first
+    assert changed is not first
+    assert changed['hash'] != first['hash']
+
+
+def test_roku_load_data_skips_unchanged(mock_device_data, discovery_data):
+    roku: Roku = Roku(location='http://127.0.0.1:8060/', discovery_data=discovery_data)
+    roku.load_data(mock_device_data)
+    roku.serial_number = 'unchanged'
+
+    roku.load_data(dict(mock_device_data))
+    assert roku.serial_number == 'unchanged'
+
+    roku.load_data(dict(mock_device_data, device_info=dict(mock_device_data['device_info'])))
+    assert roku.serial_number != 'unchanged'
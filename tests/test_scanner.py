@@ -1,3 +1,4 @@
+import socket
 from pathlib import Path
 
 import pytest
@@ -33,6 +34,8 @@ def test_scanner_data_parser(discovery_data: bytes) -> None:
     }
     assert isinstance(parsed, dict)
     assert parsed.items() == expected.items()
+    assert scanner.parse_data(memoryview(discovery_data)) == parsed
+    assert scanner.parse_data(discovery_data.decode('utf8')) == parsed
 
 
 def test_scanner_header_str_to_header_dict():
@@ -43,3 +46,25 @@ def test_scanner_header_str_to_header_dict():
     }
     assert isinstance(parsed, dict)
     assert parsed.items() == expected.items()
+
+
+def test_scanner_receive_drains_burst(discovery_data: bytes):
+    scanner: Scanner = Scanner(discovery_timeout=0.2)
+    receiver: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        receiver.bind(('127.0.0.1', 0))
+        scanner.configure_socket(receiver)
+        for i in range(500):
+            sender.sendto(discovery_data.replace(b'YN00XF7876856', f'YN{i:011d}'.encode()), receiver.getsockname())
+        sender.sendto(b'HTTP/1.1 200 OK\r\nnot a header\r\n\r\n\r\n', receiver.getsockname())
+
+        devices: list = scanner.receive(receiver)
+    finally:
+        sender.close()
+        receiver.close()
+
+    assert scanner.received_datagrams + scanner.dropped_datagrams == 501
+    assert scanner.malformed_datagrams == 1
+    assert len(devices) == scanner.received_datagrams - 1
+    assert len({device['USN'] for device in devices}) == len(devices)
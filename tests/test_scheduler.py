@@ -0,0 +1,95 @@
+import asyncio
+from typing import List
+
+from roku_scanner.scheduler import PRIORITY_HIGH, PRIORITY_LOW, RequestScheduler, TokenBucket
+from tests.conftest import MockResponse
+
+
+def test_scheduler_starts_waiting_requests_by_priority():
+    scheduler: RequestScheduler = RequestScheduler(max_concurrency=1)
+    started: List[str] = []
+
+    async def run(name: str, priority: int, hold: asyncio.Event = None):
+        async with scheduler.slot(f'http://{name}/', priority):
+            started.append(name)
+            if hold is not None:
+                await hold.wait()
+
+    async def main():
+        hold: asyncio.Event = asyncio.Event()
+        blocker = asyncio.ensure_future(run('first', PRIORITY_LOW, hold))
+        waiting = [
+            asyncio.ensure_future(run('apps', PRIORITY_LOW)),
+            asyncio.ensure_future(run('media-player', PRIORITY_HIGH))
+        ]
+        await asyncio.sleep(0.01)
+        hold.set()
+        await asyncio.gather(blocker, *waiting)
+
+    asyncio.run(main())
+    assert started == ['first', 'media-player', 'apps']
+
+
+def test_scheduler_caps_concurrency():
+    scheduler: RequestScheduler = RequestScheduler(max_concurrency=3, per_device_concurrency=1)
+    active: dict = {'total': 0, 'max': 0, 'device': {}}
+
+    async def run(device: str):
+        async with scheduler.slot(device):
+            active['total'] += 1
+            active['device'][device] = active['device'].get(device, 0) + 1
+            active['max'] = max(active['max'], active['total'])
+            assert active['device'][device] == 1
+            await asyncio.sleep(0.001)
+            active['device'][device] -= 1
+            active['total'] -= 1
+
+    async def main():
+        await asyncio.gather(*[run(f'http://127.0.0.{i % 4}/') for i in range(20)])
+
+    asyncio.run(main())
+    assert active['max'] == 3
+
+
+def test_scheduler_retries_unavailable_responses():
+    scheduler: RequestScheduler = RequestScheduler(max_retries=2, retry_backoff=0)
+    statuses: List[int] = [503, 503, 200]
+
+    async def send():
+        return MockResponse(status_code=statuses.pop(0))
+
+    resp = asyncio.run(scheduler.request('http://127.0.0.1/', PRIORITY_HIGH, send))
+    assert resp.status_code == 200
+    assert scheduler.retries == 2
+
+
+def test_token_bucket_delays_after_burst():
+    bucket: TokenBucket = TokenBucket(rate=10, burst=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert 0.05 < bucket.reserve() <= 0.1
+
+
+def test_scheduler_hands_out_tokens_by_priority():
+    scheduler: RequestScheduler = RequestScheduler(requests_per_second=50, burst=1)
+    started: List[str] = []
+
+    async def run(name: str, device: str, priority: int):
+        async with scheduler.slot(device, priority):
+            started.append(name)
+
+    async def main():
+        low = [run(f'apps-{i}', f'http://127.0.0.{i}/', PRIORITY_LOW) for i in range(20)]
+        await asyncio.gather(*low, run('media-player', 'http://127.0.0.99/', PRIORITY_HIGH))
+
+    asyncio.run(main())
+    assert started[:2] == ['apps-0', 'media-player']
+    assert len(started) == 21
+
+
+def test_scheduler_executor_fits_max_concurrency():
+    scheduler: RequestScheduler = RequestScheduler(max_concurrency=96)
+
+    assert scheduler.executor is scheduler.executor
+    assert scheduler.executor._max_workers == 96
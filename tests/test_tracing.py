@@ -0,0 +1,80 @@
+import asyncio
+import json
+import pstats
+from pathlib import Path
+
+import pytest
+
+from roku_scanner.tracing import Profiler, Tracer, profile_phase, set_profiler, set_tracer, span
+
+
+@pytest.fixture
+def tracer():
+    active: Tracer = Tracer()
+    set_tracer(active)
+    yield active
+    set_tracer(None)
+
+
+def test_span_is_noop_without_tracer():
+    with span('ecp.request', device='http://127.0.0.1:8060/') as current:
+        assert current is None
+
+
+def test_spans_nest_and_inherit_tags(tracer: Tracer):
+    with span('device.fetch', device='http://127.0.0.1:8060/') as parent:
+        with span('ecp.parse', endpoint='query/apps') as child:
+            child.tags['unchanged'] = True
+
+    assert [finished.name for finished in tracer.spans] == ['ecp.parse', 'device.fetch']
+    assert child.parent_id == parent.id
+    assert child.tags == {'device': 'http://127.0.0.1:8060/', 'endpoint': 'query/apps', 'unchanged': True}
+    assert parent.duration >= child.duration
+
+
+def test_spans_nest_per_task(tracer: Tracer):
+    async def fetch(device: str):
+        with span('device.fetch', device=device):
+            await asyncio.sleep(0)
+            with span('ecp.request'):
+                await asyncio.sleep(0)
+
+    async def main():
+        await asyncio.gather(fetch('a'), fetch('b'))
+
+    asyncio.run(main())
+    parents: dict = {finished.id: finished for finished in tracer.spans if finished.name == 'device.fetch'}
+    for child in tracer.spans:
+        if child.name == 'ecp.request':
+            assert parents[child.parent_id].tags['device'] == child.tags['device']
+
+
+@pytest.mark.parametrize('format', ['jsonl', 'chrome'])
+def test_tracer_export(tracer: Tracer, tmp_path: Path, format: str):
+    with span('serialize', device='http://127.0.0.1:8060/', format='json'):
+        pass
+
+    path: Path = tmp_path / 'trace'
+    tracer.export(path, format)
+
+    if format == 'jsonl':
+        exported: dict = json.loads(path.read_text().splitlines()[0])
+        assert exported['name'] == 'serialize'
+    else:
+        event: dict = json.loads(path.read_text())['traceEvents'][0]
+        assert event['ph'] == 'X'
+        assert event['tid'] == 'http://127.0.0.1:8060/'
+
+
+def test_profiler_writes_phase_profiles(tmp_path: Path):
+    profiler: Profiler = Profiler(tmp_path)
+    set_profiler(profiler)
+    try:
+        with profile_phase('serialize'):
+            json.dumps({'device': list(range(100))})
+    finally:
+        set_profiler(None)
+
+    written = profiler.dump()
+    assert written == [tmp_path / 'serialize.prof']
+    assert pstats.Stats(str(written[0])).total_calls > 0
@@ -0,0 +1,90 @@
+import asyncio
+import time
+from typing import List
+
+import pytest
+
+from roku_scanner.custom_types import WakeResult
+from roku_scanner.roku import Roku
+from roku_scanner.wake import apower_on, magic_packet, parse_wakeup, wait_until_ready
+
+
+def test_parse_wakeup():
+    assert parse_wakeup('MAC=e6-48-b0-c7-42-5c;Timeout=10') == ('e6-48-b0-c7-42-5c', 10.0)
+    assert parse_wakeup('MAC=e6-48-b0-c7-42-5c') == ('e6-48-b0-c7-42-5c', 10.0)
+
+    with pytest.raises(ValueError):
+        parse_wakeup('Timeout=10')
+
+
+def test_magic_packet():
+    packet: bytes = magic_packet('e6-48-b0-c7-42-5c')
+
+    assert len(packet) == 102
+    assert packet[:6] == b'\xff' * 6
+    assert packet[6:12] == bytes.fromhex('e648b0c7425c')
+    assert magic_packet('e6:48:b0:c7:42:5c') == packet
+
+    with pytest.raises(ValueError):
+        magic_packet('e6-48-b0')
+
+
+def test_apower_on_polls_until_ready(monkeypatch):
+    sent: list = []
+    polls: dict = {}
+
+    def mock_send_magic_packets(macs, broadcast, port):
+        sent.append(list(macs))
+        return len(sent[-1])
+
+    async def mock_fetch_device_info(roku_location: str) -> dict:
+        polls[roku_location] = polls.get(roku_location, 0) + 1
+        power_mode: str = 'PowerOn' if polls[roku_location] >= 3 else 'DisplayOff'
+        return {'data': {'device-info': {'power-mode': power_mode}}, 'xml': ''}
+
+    monkeypatch.setattr('roku_scanner.wake.send_magic_packets', mock_send_magic_packets)
+    monkeypatch.setattr('roku_scanner.wake.fetch_device_info', mock_fetch_device_info)
+    sleep = asyncio.sleep
+    monkeypatch.setattr('roku_scanner.wake.asyncio.sleep', lambda delay: sleep(0))
+
+    rokus: List[Roku] = [
+        Roku(location='http://127.0.0.1:8060/', discovery_data={'WAKEUP': 'MAC=e6-48-b0-c7-42-5c;Timeout=10'}),
+        Roku(location='http://127.0.0.2:8060/', discovery_data={})
+    ]
+    results: List[WakeResult] = asyncio.run(apower_on(rokus))
+
+    assert sent == [['e6-48-b0-c7-42-5c']]
+    assert results[0]['ready'] is True
+    assert results[0]['time_to_ready'] is not None
+    assert rokus[0].power_mode == 'PowerOn'
+    assert results[1]['ready'] is False
+    assert results[1]['error'] is not None
+
+
+def test_wait_until_ready_bounds_polls_by_timeout(monkeypatch):
+    async def mock_fetch_device_info(roku_location: str) -> dict:
+        await asyncio.sleep(10)
+        return {}
+
+    monkeypatch.setattr('roku_scanner.wake.fetch_device_info', mock_fetch_device_info)
+    roku: Roku = Roku(location='http://127.0.0.1:8060/', discovery_data={})
+
+    start: float = time.monotonic()
+    assert asyncio.run(wait_until_ready(roku, timeout=0.1)) is None
+    assert time.monotonic() - start < 1
+
+
+def test_wait_until_ready_handles_unexpected_bodies_and_raises_bugs(monkeypatch):
+    bodies: list = [{'Error': 'Unable to reach device'}, {'data': {'apps': {}}, 'xml': ''}]
+
+    async def mock_fetch_device_info(roku_location: str) -> dict:
+        if not bodies:
+            raise RuntimeError('bug')
+        return bodies.pop(0)
+
+    monkeypatch.setattr('roku_scanner.wake.fetch_device_info', mock_fetch_device_info)
+    roku: Roku = Roku(location='http://127.0.0.1:8060/', discovery_data={})
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(wait_until_ready(roku, timeout=5, initial_delay=0))
+    assert bodies == []